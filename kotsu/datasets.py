@@ -0,0 +1,93 @@
+"""Caching of materialized datasets on disk, memory-mapping their arrays when loaded.
+
+NumPy arrays within a dataset, including those nested in dicts, lists and tuples, are saved as
+`.npy` files and loaded back memory-mapped read-only. Loading a cached dataset is then near free,
+and processes loading the same dataset share its pages in the OS page cache rather than each
+holding a copy. The rest of the dataset (e.g. DataFrames, or arrays of python objects) is pickled.
+"""
+
+from typing import Any, List, NamedTuple
+from kotsu.typing import Dataset
+
+import os
+import pickle
+import shutil
+import tempfile
+import urllib.parse
+
+import numpy as np
+
+
+_SKELETON_FILENAME = "dataset.pkl"
+
+
+class _ArrayRef(NamedTuple):
+    """Placeholder for an array saved in its own file, within the pickled dataset."""
+
+    filename: str
+
+
+def cache_path(cache_dir: str, dataset_id: str) -> str:
+    """The path of the directory caching the dataset of the given ID."""
+    return os.path.join(cache_dir, urllib.parse.quote(dataset_id, safe=""))
+
+
+def exists(path: str) -> bool:
+    """Whether a dataset is cached at `path`."""
+    return os.path.isfile(os.path.join(path, _SKELETON_FILENAME))
+
+
+def save(dataset: Dataset, path: str):
+    """Save a dataset to the directory `path`, which must not already exist.
+
+    The dataset is written to a temporary directory which is then renamed to `path`, so a
+    dataset is never partially cached. If another process caches the dataset at `path` first,
+    theirs is kept.
+    """
+    parent_dir = os.path.dirname(path)
+    os.makedirs(parent_dir, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(dir=parent_dir, prefix=".tmp-")
+    try:
+        arrays: List[np.ndarray] = []
+        skeleton = _extract_arrays(dataset, arrays)
+        for i, array in enumerate(arrays):
+            np.save(os.path.join(tmp_path, f"{i}.npy"), array, allow_pickle=False)
+        with open(os.path.join(tmp_path, _SKELETON_FILENAME), "wb") as f:
+            pickle.dump(skeleton, f)
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            if not exists(path):
+                raise
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def load(path: str) -> Dataset:
+    """Load the dataset cached at `path`, with its arrays memory-mapped read-only."""
+    with open(os.path.join(path, _SKELETON_FILENAME), "rb") as f:
+        skeleton = pickle.load(f)
+    return _insert_arrays(skeleton, path)
+
+
+def _extract_arrays(obj: Any, arrays: List[np.ndarray]) -> Any:
+    """Replace arrays in `obj` with references to their index in `arrays`, appending them."""
+    if isinstance(obj, np.ndarray) and not obj.dtype.hasobject:
+        arrays.append(obj)
+        return _ArrayRef(f"{len(arrays) - 1}.npy")
+    if type(obj) is dict:
+        return {key: _extract_arrays(value, arrays) for key, value in obj.items()}
+    if type(obj) in (list, tuple):
+        return type(obj)(_extract_arrays(value, arrays) for value in obj)
+    return obj
+
+
+def _insert_arrays(obj: Any, path: str) -> Any:
+    """Replace references made by `_extract_arrays` with the arrays memory-mapped from `path`."""
+    if isinstance(obj, _ArrayRef):
+        return np.load(os.path.join(path, obj.filename), mmap_mode="r")
+    if type(obj) is dict:
+        return {key: _insert_arrays(value, path) for key, value in obj.items()}
+    if type(obj) in (list, tuple):
+        return type(obj)(_insert_arrays(value, path) for value in obj)
+    return obj
@@ -5,3 +5,18 @@ class EntityIsDeprecated(ValueError):
     """Raised when attempting to make an instance of a deprecated entity."""
 
     pass
+
+
+class IsolatedTaskFailed(RuntimeError):
+    """Raised for a task run in an isolated child process that failed or was killed.
+
+    Args:
+        message: Description of the failure.
+        status: Short status of the failure, e.g. "timeout".
+        elapsed_secs: Seconds the task ran for before failing.
+    """
+
+    def __init__(self, message: str, status: str, elapsed_secs: float):
+        super().__init__(message)
+        self.status = status
+        self.elapsed_secs = elapsed_secs
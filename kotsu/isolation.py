@@ -0,0 +1,256 @@
+"""Running tasks isolated in child processes, which are killed on timeout or excess memory use.
+
+Unlike `concurrent.futures.ProcessPoolExecutor`, a task hanging, crashing its process (e.g. with a
+segfault in a C extension), or running out of memory only fails that task, not the whole pool.
+"""
+
+from typing import Any, Callable, List, Optional, Tuple
+
+import collections
+import concurrent.futures
+import functools
+import logging
+import multiprocessing
+import multiprocessing.connection
+import threading
+import time
+import traceback
+
+from kotsu import error
+
+
+logger = logging.getLogger(__name__)
+
+# How often the manager thread checks on running tasks
+_POLL_SECS = 0.05
+
+# Statuses of tasks, as recorded in results
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+STATUS_TIMEOUT = "timeout"
+STATUS_MEMORY_LIMIT = "memory_limit"
+STATUS_CRASHED = "crashed"
+
+
+def _worker_loop(conn: multiprocessing.connection.Connection):
+    """Run tasks received over `conn` until told to stop, sending back their outcome."""
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        fn = task
+        try:
+            outcome: Tuple[str, Any] = (STATUS_OK, fn())
+        except Exception as e:
+            logger.debug(traceback.format_exc())
+            outcome = (STATUS_ERROR, f"{type(e).__name__}: {e}")
+        try:
+            conn.send(outcome)
+        except Exception as e:
+            conn.send((STATUS_ERROR, f"Could not send result to parent: {type(e).__name__}: {e}"))
+
+
+def process_rss_gb(pid: int) -> Optional[float]:
+    """The resident memory of a process in GB, or None if unknown (e.g. not on Linux)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024**2
+    except OSError:
+        pass
+    return None
+
+
+class _Task:
+    def __init__(self, future: concurrent.futures.Future, fn: Callable, timeout_secs):
+        self.future = future
+        self.fn = fn
+        self.timeout_secs = timeout_secs
+        self.start_time = 0.0
+
+
+class _Worker:
+    def __init__(self, mp_context):
+        self.conn, child_conn = mp_context.Pipe()
+        self.process = mp_context.Process(target=_worker_loop, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.n_tasks = 0
+        self.task: Optional[_Task] = None
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class IsolatedExecutor(concurrent.futures.Executor):
+    """Executor running each task in a child process that is killed if the task misbehaves.
+
+    Tasks that raise, time out, exceed the memory limit, or crash their process have their future
+    set with a `kotsu.error.IsolatedTaskFailed` exception recording why. Killed or crashed
+    processes are replaced for later tasks.
+
+    Args:
+        max_workers: The maximum number of child processes to run tasks in at once.
+        memory_limit_gb: Kill a task's process if its resident memory exceeds this many GB.
+            Only enforced where process memory can be read from `/proc` (i.e. Linux).
+        max_tasks_per_child: Replace a child process with a fresh one after it has run this many
+            tasks, so memory leaked by tasks doesn't accumulate. If None, child processes are
+            reused for the life of the executor.
+        mp_context: The multiprocessing context to start child processes with.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        memory_limit_gb: Optional[float] = None,
+        max_tasks_per_child: Optional[int] = None,
+        mp_context=None,
+    ):
+        self._max_workers = max_workers
+        self._memory_limit_gb = memory_limit_gb
+        self._max_tasks_per_child = max_tasks_per_child
+        self._mp_context = mp_context or multiprocessing.get_context()
+        self._queue: collections.deque = collections.deque()
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+        self._manager = threading.Thread(target=self._manage, name="kotsu-isolated", daemon=True)
+        self._manager.start()
+
+    def submit(self, fn, /, *args, **kwargs) -> concurrent.futures.Future:
+        """Submit a task to run in a child process, without a timeout."""
+        return self.submit_with_timeout(None, fn, *args, **kwargs)
+
+    def submit_with_timeout(
+        self, timeout_secs: Optional[float], fn, /, *args, **kwargs
+    ) -> concurrent.futures.Future:
+        """Submit a task to run in a child process, killing it if it runs over `timeout_secs`."""
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Cannot submit tasks after shutdown.")
+            future: concurrent.futures.Future = concurrent.futures.Future()
+            self._queue.append(_Task(future, functools.partial(fn, *args, **kwargs), timeout_secs))
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        """Shut down once running and queued tasks are done, see `Executor.shutdown`."""
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                while self._queue:
+                    self._queue.popleft().future.cancel()
+        if wait:
+            self._manager.join()
+
+    def _manage(self):
+        """Start queued tasks on idle workers, and collect outcomes of running tasks."""
+        while True:
+            with self._lock:
+                self._start_queued_tasks()
+                busy_workers = [worker for worker in self._workers if worker.task is not None]
+                if self._shutdown and not self._queue and not busy_workers:
+                    break
+            ready = multiprocessing.connection.wait(
+                [worker.conn for worker in busy_workers], timeout=_POLL_SECS
+            )
+            for worker in busy_workers:
+                if worker.conn in ready:
+                    self._collect_outcome(worker)
+                else:
+                    self._check_limits(worker)
+        for worker in self._workers:
+            worker.stop()
+        self._workers = []
+
+    def _start_queued_tasks(self):
+        while self._queue:
+            idle_workers = [worker for worker in self._workers if worker.task is None]
+            if idle_workers:
+                worker = idle_workers[0]
+            elif len(self._workers) < self._max_workers:
+                worker = _Worker(self._mp_context)
+                self._workers.append(worker)
+            else:
+                return
+            task = self._queue.popleft()
+            if not task.future.set_running_or_notify_cancel():
+                continue
+            task.start_time = time.time()
+            worker.task = task
+            worker.n_tasks += 1
+            try:
+                worker.conn.send(task.fn)
+            except Exception as e:
+                worker.task = None
+                self._fail(task, STATUS_ERROR, f"Could not send task to child process: {e}")
+
+    def _collect_outcome(self, worker: _Worker):
+        task = worker.task
+        assert task is not None
+        try:
+            status, value = worker.conn.recv()
+        except (EOFError, OSError):
+            worker.process.join()
+            self._retire(worker, kill=True)
+            self._fail(
+                task,
+                STATUS_CRASHED,
+                f"Child process crashed with exit code {worker.process.exitcode}",
+            )
+            return
+        worker.task = None
+        if self._max_tasks_per_child is not None and worker.n_tasks >= self._max_tasks_per_child:
+            self._retire(worker, kill=False)
+        if status == STATUS_OK:
+            task.future.set_result(value)
+        else:
+            self._fail(task, status, value)
+
+    def _check_limits(self, worker: _Worker):
+        task = worker.task
+        assert task is not None
+        elapsed_secs = time.time() - task.start_time
+        if task.timeout_secs is not None and elapsed_secs > task.timeout_secs:
+            self._retire(worker, kill=True)
+            self._fail(task, STATUS_TIMEOUT, f"Timed out after {task.timeout_secs} secs")
+            return
+        if self._memory_limit_gb is not None:
+            rss_gb = process_rss_gb(worker.process.pid)
+            if rss_gb is not None and rss_gb > self._memory_limit_gb:
+                self._retire(worker, kill=True)
+                self._fail(
+                    task,
+                    STATUS_MEMORY_LIMIT,
+                    f"Used {rss_gb:.2f} GB, over the memory limit of {self._memory_limit_gb} GB",
+                )
+
+    def _retire(self, worker: _Worker, kill: bool):
+        with self._lock:
+            self._workers.remove(worker)
+        if kill:
+            worker.kill()
+        else:
+            worker.stop()
+
+    def _fail(self, task: _Task, status: str, message: str):
+        logger.warning(f"Isolated task failed with status {status}: {message}")
+        task.future.set_exception(
+            error.IsolatedTaskFailed(message, status, time.time() - task.start_time)
+        )
@@ -6,15 +6,16 @@ which can be passed to kotsu's run interface.
 Based on: https://github.com/openai/gym/blob/master/gym/envs/registration.py
 """
 
-from typing import Callable, Generic, Optional, TypeVar, Union
-from kotsu.typing import Model, Validation
+from typing import Callable, Dict, Generic, NamedTuple, Optional, TypeVar, Union
+from kotsu.typing import Dataset, Model, Validation
 
 import importlib
 import logging
 import re
+import threading
 import warnings
 
-from kotsu import error
+from kotsu import datasets, error
 
 
 logger = logging.getLogger(__name__)
@@ -29,6 +30,21 @@ Entity = TypeVar("Entity")
 entity_id_re = re.compile(r"^(?:[\w:-]+\/)?([\w:.\-{}=\[\]]+)-v([\d.]+)$")
 
 
+class Resources(NamedTuple):
+    """Resources an entity needs when run, used to pack concurrent runs onto the machine.
+
+    Args:
+        cpus: The number of CPUs (i.e. worker slots) used.
+        memory_gb: The peak memory used in GB.
+        exclusive: Whether to run alone, without any other validation-model combinations running
+            at the same time.
+    """
+
+    cpus: float = 1
+    memory_gb: float = 0
+    exclusive: bool = False
+
+
 def _load(name: str):
     """Load a python object from string.
 
@@ -58,6 +74,12 @@ class _Spec(Generic[Entity]):
             considered deprecated and replaced by a more recent/better validation/model
         nondeterministic: Whether this entity is non-deterministic even after seeding
         kwargs: The kwargs to pass to the entity entry point when instantiating the entity
+        resources: The resources needed when running the entity, as a Resources or a dict of its
+            fields, e.g. `{"cpus": 4, "memory_gb": 30}`. Defaults to 1 CPU and no memory hint.
+        timeout_secs: The number of seconds after which to kill runs of the entity, when run
+            isolated.
+        datasets: The datasets to pass to the entity entry point when made by a run, as a dict of
+            kwarg name to the ID of a dataset in the run's dataset registry.
     """
 
     def __init__(
@@ -67,12 +89,23 @@ class _Spec(Generic[Entity]):
         deprecated: bool = False,
         nondeterministic: bool = False,
         kwargs: Optional[dict] = None,
+        resources: Optional[Union[Resources, dict]] = None,
+        timeout_secs: Optional[float] = None,
+        datasets: Optional[Dict[str, str]] = None,
     ):
         self.id = id
         self.entry_point = entry_point
         self.deprecated = deprecated
         self.nondeterministic = nondeterministic
         self._kwargs = {} if kwargs is None else kwargs
+        if resources is None:
+            self.resources = Resources()
+        elif isinstance(resources, Resources):
+            self.resources = resources
+        else:
+            self.resources = Resources(**resources)
+        self.timeout_secs = timeout_secs
+        self.datasets = {} if datasets is None else datasets
 
         match = entity_id_re.search(id)
         if not match:
@@ -131,6 +164,9 @@ class _Registry(Generic[Entity]):
         deprecated: bool = False,
         nondeterministic: bool = False,
         kwargs: Optional[dict] = None,
+        resources: Optional[Union[Resources, dict]] = None,
+        timeout_secs: Optional[float] = None,
+        datasets: Optional[Dict[str, str]] = None,
     ):
         """Register an entity.
 
@@ -146,6 +182,13 @@ class _Registry(Generic[Entity]):
                 considered deprecated and replaced by a more recent/better validation/model.
             nondeterministic: Whether this entity is non-deterministic even after seeding
             kwargs: The kwargs to pass to the entity entry point when instantiating the entity
+            resources: The resources needed when running the entity, as a Resources or a dict of
+                its fields, e.g. `{"cpus": 4, "memory_gb": 30}`. Defaults to 1 CPU and no memory
+                hint.
+            timeout_secs: The number of seconds after which to kill runs of the entity, when run
+                isolated.
+            datasets: The datasets to pass to the entity entry point when made by a run, as a dict
+                of kwarg name to the ID of a dataset in the run's dataset registry.
         """
         if id in self.entity_specs:
             warnings.warn(
@@ -159,6 +202,9 @@ class _Registry(Generic[Entity]):
             deprecated=deprecated,
             nondeterministic=nondeterministic,
             kwargs=kwargs,
+            resources=resources,
+            timeout_secs=timeout_secs,
+            datasets=datasets,
         )
 
 
@@ -167,3 +213,59 @@ ModelRegistry = _Registry[Model]
 
 ValidationSpec = _Spec[Validation]
 ValidationRegistry = _Registry[Validation]
+
+DatasetSpec = _Spec[Dataset]
+
+
+class DatasetRegistry(_Registry[Dataset]):
+    """Register datasets by ID, materializing each at most once per process.
+
+    Datasets are registered like models and validations, with an entry point that loads the
+    dataset. Validations (or models) that use a dataset name it in their registered `datasets`, and
+    are passed it when made by a run.
+
+    Args:
+        cache_dir: A directory to cache materialized datasets in, by ID. Cached datasets are loaded
+            instead of made, even by later runs, and NumPy arrays within them are memory-mapped,
+            so worker processes share their pages rather than each holding a copy. As with other
+            entities, a dataset ID should always resolve to the same data; register a new version
+            for changed data. If None (default), datasets are only kept in memory of the process
+            they were made in.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        super().__init__()
+        self.cache_dir = cache_dir
+        self._datasets: Dict[str, Dataset] = {}
+        self._lock = threading.Lock()
+
+    def materialize(self, id: str) -> Dataset:
+        """Get the dataset of the given ID, making or loading it if not already in memory.
+
+        Safe to call from concurrent threads, which share the materialized dataset.
+        """
+        with self._lock:
+            if id not in self._datasets:
+                self._datasets[id] = self._load_or_make(id)
+            return self._datasets[id]
+
+    def _load_or_make(self, id: str) -> Dataset:
+        if self.cache_dir is None:
+            return self.make(id)
+        path = datasets.cache_path(self.cache_dir, id)
+        if not datasets.exists(path):
+            datasets.save(self.make(id), path)
+        else:
+            logger.info(f"Loading cached dataset: {id}")
+        return datasets.load(path)
+
+    def __getstate__(self):
+        # Materialized datasets are not sent to worker processes, which load them from the cache
+        state = self.__dict__.copy()
+        state["_datasets"] = {}
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
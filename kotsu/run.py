@@ -1,40 +1,86 @@
 """Interface for running a registry of models on a registry of validations."""
 
-from typing import List, Optional, Tuple, Union
+from typing import Iterator, List, Optional, Tuple, Union
 from typing_extensions import Literal
 from kotsu.typing import Model, Results, Validation
 
+import asyncio
+import concurrent.futures
 import functools
+import inspect
 import logging
+import math
 import os
+import sys
+import threading
 import time
 
 import pandas as pd
 
-from kotsu import store
-from kotsu.registration import ModelRegistry, ModelSpec, ValidationRegistry, ValidationSpec
+from kotsu import error, isolation, scheduling, store
+from kotsu.registration import (
+    DatasetRegistry,
+    ModelRegistry,
+    ModelSpec,
+    Resources,
+    ValidationRegistry,
+    ValidationSpec,
+    _load,
+    _Spec,
+)
 
 
 logger = logging.getLogger(__name__)
 
 
+# A reference to a spec that can be sent to a worker process; either the spec itself, or a tuple of
+# (registry import path, spec ID) for specs in registries that were passed to `run` by import path.
+_SpecRef = Union[_Spec, Tuple[str, str]]
+
+Backend = Literal["process", "thread", "isolated"]
+
+# Serialises making artefacts dirs between threads of the "thread" backend, as concurrent
+# `os.makedirs` calls on overlapping paths can race on creating shared parent dirs.
+_makedirs_lock = threading.Lock()
+
+# How often to retry starting queued pairs held back by memory pressure in parallel runs
+_LAUNCH_POLL_SECS = 1.0
+
+
 def run(
-    model_registry: ModelRegistry,
-    validation_registry: ValidationRegistry,
+    model_registry: Union[ModelRegistry, str],
+    validation_registry: Union[ValidationRegistry, str],
     results_path: str = "./validation_results.csv",
     force_rerun: Optional[Union[Literal["all"], List[str]]] = None,
     artefacts_store_dir: Optional[str] = None,
     run_params: Optional[dict] = None,
+    n_jobs: int = 1,
+    backend: Optional[Backend] = None,
+    max_memory_gb: Optional[float] = None,
+    timeout_secs: Optional[float] = None,
+    memory_limit_gb: Optional[float] = None,
+    max_tasks_per_child: Optional[int] = None,
+    results_store: Optional[store.ResultsStore] = None,
+    dataset_registry: Optional[Union[DatasetRegistry, str]] = None,
 ) -> pd.DataFrame:
     """Run a registry of models through a registry of validations.
 
     Args:
         model_registry: A ModelRegistry containing the registry of models to be run through
-            validations.
+            validations, or the string import path to one (e.g. `module.name:model_registry`).
         validation_registry: A ValidationRegistry containing the registry of validations to run
-            each model through.
+            each model through, or the string import path to one.
         results_path: The file path to which the results will be written to, and results from prior
-            runs will be read from.
+            runs will be read from. Results are stored as CSV, unless the path ends in:
+            - `.parquet`, then they are stored as a directory of Parquet files partitioned by
+              validation ID (needs `pyarrow`).
+            - `.sqlite`, `.sqlite3` or `.db`, then they are stored in a SQLite database. Each
+              result is stored as soon as it completes, and the database can be shared by runs in
+              concurrent processes.
+            For CSV and Parquet, while running each result is also appended as soon as it
+            completes to a log next to the results path (`<results_path>.wal`). If the run doesn't
+            complete, e.g. it crashes or is interrupted, the next run reads the logged results as
+            results of prior runs.
         force_rerun: Argument to force models to rerun on validations. Model-validation
             combinations without results will always be ran, as well as models that are forced via
             this argument, which will overwrite previous results.
@@ -46,65 +92,818 @@ def run(
             If not None, then validations will be passed two kwargs; `validation_artefacts_dir` and
             `model_artefacts_dir`.
         run_params: A dictionary of optional run parameters.
+        n_jobs: The number of workers to run validation-model combinations in. If 1 (default),
+            combinations are run serially in the current process. If -1, use as many workers as
+            there are CPUs.
+        backend: The kind of workers to use.
+            - if `backend` = "process", run in worker processes. The specs are sent to the workers
+              and made there, so specs must be picklable, or their registries must be passed by
+              import path.
+            - if `backend` = "thread", run in worker threads of the current process. Suited to
+              validations that are I/O bound or spend their time in code that releases the GIL,
+              and lets validations share data loaded in memory.
+            - if `backend` = "isolated", run each combination in a child process that is killed
+              if it runs over its timeout or `memory_limit_gb`. Failing, killed or crashed
+              combinations don't abort the run, but are recorded in results with their `status`
+              and `error`. Used even when `n_jobs` is 1. Specs are sent to child processes as for
+              "process".
+            - if `backend` = None (default), use "thread" on free-threaded Python builds running
+              with the GIL disabled, otherwise "process".
+            Unless "isolated", the backend is only used when `n_jobs` is not 1.
+            Workers are given validation-model combinations longest expected runtime first, as
+            estimated from `runtime_secs` of prior results, so that long running combinations
+            don't start last and leave other workers idle.
+            Workers are also packed using the `resources` registered for validations and models;
+            each worker counts as one CPU, pairs are only started when their memory fits in
+            `max_memory_gb`, exclusive pairs run alone, and starts are held back when the system
+            is low on available memory.
+        max_memory_gb: The memory in GB that validation-model combinations running in parallel
+            can use in total, as declared by their `resources`. Defaults to the total memory of
+            the system.
+        timeout_secs: For the "isolated" backend, the number of seconds after which to kill a
+            validation-model combination. A `timeout_secs` registered for the validation or model
+            takes precedence if shorter.
+        memory_limit_gb: For the "isolated" backend, the resident memory in GB above which to kill
+            a validation-model combination.
+        max_tasks_per_child: For the "isolated" backend, the number of validation-model
+            combinations after which a child process is replaced with a fresh one, so that any
+            memory leaked doesn't accumulate. If None (default), child processes are reused.
+        results_store: The store to read results of prior runs from and write results to. If
+            given, takes precedence over `results_path`.
+        dataset_registry: A DatasetRegistry of the datasets named in the registered `datasets` of
+            validations and models, or the string import path to one. Each dataset is materialized
+            once per process and passed to the entry points that name it. When running in
+            parallel, datasets used by the run are cached before starting, if the registry has a
+            `cache_dir`, so that workers load them memory-mapped.
 
     Returns:
         pd.DataFrame: dataframe of validation results.
     """
+    results_store_ = _resolve_results_store(results_path, results_store)
+    for _ in _run_iter(
+        model_registry,
+        validation_registry,
+        results_store_,
+        force_rerun,
+        artefacts_store_dir,
+        run_params,
+        n_jobs,
+        backend,
+        max_memory_gb,
+        timeout_secs,
+        memory_limit_gb,
+        max_tasks_per_child,
+        dataset_registry,
+    ):
+        pass
+    return _merge_and_write_results(results_store_)
+
+
+def run_iter(
+    model_registry: Union[ModelRegistry, str],
+    validation_registry: Union[ValidationRegistry, str],
+    results_path: str = "./validation_results.csv",
+    force_rerun: Optional[Union[Literal["all"], List[str]]] = None,
+    artefacts_store_dir: Optional[str] = None,
+    run_params: Optional[dict] = None,
+    n_jobs: int = 1,
+    backend: Optional[Backend] = None,
+    max_memory_gb: Optional[float] = None,
+    timeout_secs: Optional[float] = None,
+    memory_limit_gb: Optional[float] = None,
+    max_tasks_per_child: Optional[int] = None,
+    results_store: Optional[store.ResultsStore] = None,
+    dataset_registry: Optional[Union[DatasetRegistry, str]] = None,
+) -> Iterator[Results]:
+    """Run models through validations as `run` does, yielding results as they complete.
+
+    Each results row is yielded, with its meta data (e.g. `runtime_secs`), as soon as its
+    validation-model combination completes, and has already been added to the results store. Rows
+    are not kept in memory, so results can be consumed as they arrive without waiting for the
+    slowest combination. Once all combinations complete, results are merged into the results
+    store as by `run`. If iteration is stopped early, results yielded so far are recovered by the
+    next run.
+
+    Args:
+        model_registry: See `run`.
+        validation_registry: See `run`.
+        results_path: See `run`.
+        force_rerun: See `run`.
+        artefacts_store_dir: See `run`.
+        run_params: See `run`.
+        n_jobs: See `run`.
+        backend: See `run`.
+        max_memory_gb: See `run`.
+        timeout_secs: See `run`.
+        memory_limit_gb: See `run`.
+        max_tasks_per_child: See `run`.
+        results_store: See `run`.
+        dataset_registry: See `run`.
+
+    Yields:
+        Results: results row of each validation-model combination, in order of completion.
+    """
+    results_store_ = _resolve_results_store(results_path, results_store)
+    yield from _run_iter(
+        model_registry,
+        validation_registry,
+        results_store_,
+        force_rerun,
+        artefacts_store_dir,
+        run_params,
+        n_jobs,
+        backend,
+        max_memory_gb,
+        timeout_secs,
+        memory_limit_gb,
+        max_tasks_per_child,
+        dataset_registry,
+    )
+    _merge_and_write_results(results_store_)
+
+
+def _run_iter(
+    model_registry: Union[ModelRegistry, str],
+    validation_registry: Union[ValidationRegistry, str],
+    results_store: store.ResultsStore,
+    force_rerun: Optional[Union[Literal["all"], List[str]]],
+    artefacts_store_dir: Optional[str],
+    run_params: Optional[dict],
+    n_jobs: int,
+    backend: Optional[Backend],
+    max_memory_gb: Optional[float],
+    timeout_secs: Optional[float],
+    memory_limit_gb: Optional[float],
+    max_tasks_per_child: Optional[int],
+    dataset_registry: Optional[Union[DatasetRegistry, str]],
+) -> Iterator[Results]:
+    """Run pending validation-model pairs, adding results to the store and yielding them."""
     if run_params is None:
         run_params = {}
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs < 1:
+        raise ValueError(f"n_jobs must be a positive integer or -1, got {n_jobs}.")
+    serial = n_jobs == 1 and backend != "isolated"
+    if backend is None:
+        backend = "process" if _is_gil_enabled() else "thread"
+    if backend not in ("process", "thread", "isolated"):
+        raise ValueError(
+            f'backend must be one of "process", "thread" or "isolated", got {backend}.'
+        )
 
-    try:
-        results_df = pd.read_csv(results_path)
-    except FileNotFoundError:
-        results_df = pd.DataFrame(columns=["validation_id", "model_id", "runtime_secs"])
-        results_df["runtime_secs"] = results_df["runtime_secs"].astype(int)
+    model_registry_path, model_registry_ = _resolve_registry(model_registry)
+    validation_registry_path, validation_registry_ = _resolve_registry(validation_registry)
+    _, dataset_registry_ = _resolve_registry(dataset_registry)
 
-    results_df = results_df.set_index(["validation_id", "model_id"], drop=False)
-    results_list = []
+    results_df = _read_results(results_store)
+    pending_pairs = _plan_pairs(validation_registry_, model_registry_, results_df, force_rerun)
+    pending_pairs = _schedule_pairs(pending_pairs, results_df, n_jobs)
 
-    for validation_spec in validation_registry.all():
-        if validation_spec.deprecated:
-            logger.info(f"Skipping validation: {validation_spec.id} - as is deprecated.")
-            continue
-        for model_spec in model_registry.all():
-            if model_spec.deprecated:
-                logger.info(f"Skipping model: {model_spec.id} - as is deprecated.")
-                continue
-
-            if (
-                not force_rerun == "all"
-                and not (isinstance(force_rerun, list) and model_spec.id in force_rerun)
-                and (validation_spec.id, model_spec.id) in results_df.index
-            ):
-                logger.info(
-                    f"Skipping validation - model: {validation_spec.id} - {model_spec.id}"
-                    ", as found prior result in results."
-                )
-                continue
+    if serial:
+        yield from _run_pairs_serially(
+            pending_pairs,
+            artefacts_store_dir,
+            run_params,
+            results_store,
+            force_rerun,
+            dataset_registry_,
+        )
+    else:
+        if dataset_registry_ is not None and dataset_registry_.cache_dir is not None:
+            _cache_datasets(pending_pairs, dataset_registry_)
+        yield from _run_pairs_in_pool(
+            pending_pairs,
+            n_jobs,
+            backend,
+            artefacts_store_dir,
+            run_params,
+            validation_registry_path,
+            model_registry_path,
+            max_memory_gb,
+            timeout_secs,
+            memory_limit_gb,
+            max_tasks_per_child,
+            results_store,
+            force_rerun,
+            dataset_registry,
+        )
 
-            logger.info(f"Running validation - model: {validation_spec.id} - {model_spec.id}")
 
-            validation = validation_spec.make()
-            validation = _form_validation_partial_with_store_dirs(
-                validation,
-                artefacts_store_dir,
+async def arun(
+    model_registry: Union[ModelRegistry, str],
+    validation_registry: Union[ValidationRegistry, str],
+    results_path: str = "./validation_results.csv",
+    force_rerun: Optional[Union[Literal["all"], List[str]]] = None,
+    artefacts_store_dir: Optional[str] = None,
+    run_params: Optional[dict] = None,
+    max_concurrency: int = 8,
+    executor: Optional[concurrent.futures.Executor] = None,
+    results_store: Optional[store.ResultsStore] = None,
+    dataset_registry: Optional[Union[DatasetRegistry, str]] = None,
+) -> pd.DataFrame:
+    """Run a registry of models through a registry of validations, concurrently with asyncio.
+
+    Validations that are coroutine functions (`async def`) are awaited in the running event loop,
+    so many validation-model combinations can wait on e.g. a model server at once. Synchronous
+    validations, and the making of validations and models from their specs, are offloaded to
+    `executor` so they don't block the event loop.
+
+    Args:
+        model_registry: See `run`.
+        validation_registry: See `run`.
+        results_path: See `run`.
+        force_rerun: See `run`.
+        artefacts_store_dir: See `run`.
+        run_params: See `run`.
+        max_concurrency: The maximum number of validation-model combinations to run at once.
+        executor: The executor to offload synchronous work to. If None (default), use the event
+            loop's default executor.
+        results_store: See `run`.
+        dataset_registry: See `run`.
+
+    Returns:
+        pd.DataFrame: dataframe of validation results.
+    """
+    if run_params is None:
+        run_params = {}
+    if max_concurrency < 1:
+        raise ValueError(f"max_concurrency must be a positive integer, got {max_concurrency}.")
+
+    _, model_registry_ = _resolve_registry(model_registry)
+    _, validation_registry_ = _resolve_registry(validation_registry)
+    _, dataset_registry_ = _resolve_registry(dataset_registry)
+
+    results_store_ = _resolve_results_store(results_path, results_store)
+    results_df = _read_results(results_store_)
+    pending_pairs = _plan_pairs(validation_registry_, model_registry_, results_df, force_rerun)
+    pending_pairs = _schedule_pairs(pending_pairs, results_df, max_concurrency)
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_pair(validation_spec: ValidationSpec, model_spec: ModelSpec):
+        async with semaphore:
+            if _stored_by_other_run(results_store_, validation_spec, model_spec, force_rerun):
+                return
+            logger.info(f"Running validation - model: {validation_spec.id} - {model_spec.id}")
+            results, elapsed_secs = await _arun_validation_model(
                 validation_spec,
                 model_spec,
+                artefacts_store_dir,
+                run_params,
+                executor,
+                dataset_registry_,
             )
+        results = _add_meta_data_to_results(results, elapsed_secs, validation_spec, model_spec)
+        results_store_.add(results)
+
+    tasks = [asyncio.ensure_future(run_pair(*pair)) for pair in pending_pairs]
+    try:
+        for task in asyncio.as_completed(tasks):
+            await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    return _merge_and_write_results(results_store_)
+
+
+def plan(
+    model_registry: Union[ModelRegistry, str],
+    validation_registry: Union[ValidationRegistry, str],
+    results_path: str = "./validation_results.csv",
+    force_rerun: Optional[Union[Literal["all"], List[str]]] = None,
+    results_store: Optional[store.ResultsStore] = None,
+) -> List[Tuple[ValidationSpec, ModelSpec]]:
+    """Plan which validation-model combinations a run would run, without running them.
+
+    Args:
+        model_registry: See `run`.
+        validation_registry: See `run`.
+        results_path: See `run`.
+        force_rerun: See `run`.
+        results_store: See `run`.
+
+    Returns:
+        List of (validation spec, model spec) tuples of the combinations to run, in registry
+            order.
+    """
+    _, model_registry_ = _resolve_registry(model_registry)
+    _, validation_registry_ = _resolve_registry(validation_registry)
+    results_df = _read_results(_resolve_results_store(results_path, results_store))
+    return _plan_pairs(validation_registry_, model_registry_, results_df, force_rerun)
+
+
+def _resolve_results_store(
+    results_path: str, results_store: Optional[store.ResultsStore]
+) -> store.ResultsStore:
+    """Get the given results store, or otherwise the store for the results path."""
+    return results_store if results_store is not None else store.get_store(results_path)
+
+
+def _read_results(results_store: store.ResultsStore) -> pd.DataFrame:
+    """Read the key columns and runtimes of results of prior runs, indexed by key.
+
+    Includes results added by prior runs that didn't complete, e.g. due to a crash or interrupt.
+    """
+    results_df = results_store.read(columns=store.META_COLUMNS)
+
+    recovered_results_list = results_store.recover()
+    if recovered_results_list:
+        logger.info(
+            f"Recovered {len(recovered_results_list)} results added by a prior incomplete run."
+        )
+        recovered_results_df = pd.DataFrame.from_records(recovered_results_list)
+        results_df = pd.concat([results_df, recovered_results_df[store.META_COLUMNS]])
+        results_df = results_df.drop_duplicates(subset=store.KEY_COLUMNS, keep="last")
+
+    return results_df.set_index(store.KEY_COLUMNS, drop=False)
+
+
+def _merge_and_write_results(results_store: store.ResultsStore) -> pd.DataFrame:
+    """Merge results added to the results store by this and prior incomplete runs into it.
+
+    Returns:
+        pd.DataFrame: dataframe of all results.
+    """
+    return results_store.merge(results_store.recover())
+
+
+def _plan_pairs(
+    validation_registry: ValidationRegistry,
+    model_registry: ModelRegistry,
+    results_df: pd.DataFrame,
+    force_rerun: Optional[Union[Literal["all"], List[str]]],
+) -> List[Tuple[ValidationSpec, ModelSpec]]:
+    """Get the validation-model pairs that need to be run, in order.
+
+    Pairs of non-deprecated validations and models need to be run if they don't have prior results
+    in `results_df`, which must be indexed by key, or if their model is forced to rerun. Which
+    pairs have prior results is found for all pairs at once, with a vectorized index lookup.
+    """
+    validation_specs = _non_deprecated_specs(validation_registry, "validation")
+    model_specs = _non_deprecated_specs(model_registry, "model")
+
+    pair_index = pd.MultiIndex.from_product(
+        [[spec.id for spec in validation_specs], [spec.id for spec in model_specs]],
+        names=store.KEY_COLUMNS,
+    )
+    has_prior_results = pair_index.isin(results_df.index)
+    if force_rerun == "all":
+        is_forced = pair_index.get_level_values("model_id").notna()
+    else:
+        is_forced = pair_index.get_level_values("model_id").isin(force_rerun or [])
+    pending_positions = (~has_prior_results | is_forced).nonzero()[0]
+
+    n_skipped = len(pair_index) - len(pending_positions)
+    if n_skipped:
+        logger.info(
+            f"Skipping {n_skipped} validation - model combinations, as found prior results in "
+            "results."
+        )
+    n_models = len(model_specs)
+    return [
+        (validation_specs[position // n_models], model_specs[position % n_models])
+        for position in pending_positions
+    ]
+
+
+def _non_deprecated_specs(registry, entity_name: str) -> List[_Spec]:
+    """Get the specs of a registry that aren't deprecated, logging those that are skipped."""
+    specs = []
+    for spec in registry.all():
+        if spec.deprecated:
+            logger.info(f"Skipping {entity_name}: {spec.id} - as is deprecated.")
+        else:
+            specs.append(spec)
+    return specs
+
+
+def _schedule_pairs(
+    pending_pairs: List[Tuple[ValidationSpec, ModelSpec]],
+    results_df: pd.DataFrame,
+    n_workers: int,
+) -> List[Tuple[ValidationSpec, ModelSpec]]:
+    """Order pairs to run longest expected runtime first if running on multiple workers.
+
+    Also logs the predicted total runtime of the pairs.
+    """
+    estimates = scheduling.estimate_runtimes(
+        [(validation_spec.id, model_spec.id) for validation_spec, model_spec in pending_pairs],
+        results_df,
+    )
+    if n_workers > 1:
+        order = scheduling.order_longest_first(list(range(len(pending_pairs))), estimates)
+        pending_pairs = [pending_pairs[i] for i in order]
+        estimates = [estimates[i] for i in order]
+    makespan = scheduling.predict_makespan(estimates, n_workers)
+    logger.info(
+        f"Running {len(pending_pairs)} validation-model combinations on {n_workers} worker(s), "
+        + (
+            f"predicted total runtime: {makespan:.1f} secs."
+            if not math.isnan(makespan)
+            else "no prior runtimes to predict total runtime from."
+        )
+    )
+    return pending_pairs
+
+
+def _is_forced_to_rerun(
+    model_spec: ModelSpec, force_rerun: Optional[Union[Literal["all"], List[str]]]
+) -> bool:
+    """Whether a model is forced to rerun, see `force_rerun` of `run`."""
+    return force_rerun == "all" or (isinstance(force_rerun, list) and model_spec.id in force_rerun)
+
 
-            model = model_spec.make()
-            results, elapsed_secs = _run_validation_model(validation, model, run_params)
-            results = _add_meta_data_to_results(results, elapsed_secs, validation_spec, model_spec)
-            results_list.append(results)
-
-    additional_results_df = pd.DataFrame.from_records(results_list)
-    results_df = pd.concat([results_df, additional_results_df], ignore_index=True)
-    results_df = results_df.drop_duplicates(subset=["validation_id", "model_id"], keep="last")
-    results_df = results_df.sort_values(by=["validation_id", "model_id"]).reset_index(drop=True)
-    store.write(
-        results_df, results_path, to_front_cols=["validation_id", "model_id", "runtime_secs"]
+def _stored_by_other_run(
+    results_store: store.ResultsStore,
+    validation_spec: ValidationSpec,
+    model_spec: ModelSpec,
+    force_rerun: Optional[Union[Literal["all"], List[str]]],
+) -> bool:
+    """Whether a pair not forced to rerun has been stored since results were read."""
+    if _is_forced_to_rerun(model_spec, force_rerun):
+        return False
+    if results_store.contains(validation_spec.id, model_spec.id):
+        logger.info(
+            f"Skipping validation - model: {validation_spec.id} - {model_spec.id}"
+            ", as results were stored by another run."
+        )
+        return True
+    return False
+
+
+def _resolve_registry(registry):
+    """Resolve a registry that may be given by its import path.
+
+    Returns:
+        A tuple of (import path or None, registry)
+    """
+    if isinstance(registry, str):
+        return registry, _load(registry)
+    return None, registry
+
+
+def _spec_ref(spec: _Spec, registry_path: Optional[str]) -> _SpecRef:
+    """Form a reference to a spec for sending to a worker process."""
+    if registry_path is not None:
+        return (registry_path, spec.id)
+    return spec
+
+
+def _deref_spec(spec_ref: _SpecRef) -> _Spec:
+    """Get the spec a reference made by `_spec_ref` points to."""
+    if isinstance(spec_ref, tuple):
+        registry_path, spec_id = spec_ref
+        return _load(registry_path).entity_specs[spec_id]
+    return spec_ref
+
+
+def _run_pairs_serially(
+    pending_pairs: List[Tuple[ValidationSpec, ModelSpec]],
+    artefacts_store_dir: Union[str, None],
+    run_params: dict,
+    results_store: store.ResultsStore,
+    force_rerun: Optional[Union[Literal["all"], List[str]]],
+    dataset_registry: Optional[DatasetRegistry] = None,
+) -> Iterator[Results]:
+    """Run validation-model pairs one after another in this process, yielding their results.
+
+    Results are added to the results store before being yielded.
+    """
+    for validation_spec, model_spec in pending_pairs:
+        if _stored_by_other_run(results_store, validation_spec, model_spec, force_rerun):
+            continue
+        logger.info(f"Running validation - model: {validation_spec.id} - {model_spec.id}")
+        results, elapsed_secs = _make_and_run_validation_model(
+            validation_spec, model_spec, artefacts_store_dir, run_params, dataset_registry
+        )
+        results = _add_meta_data_to_results(results, elapsed_secs, validation_spec, model_spec)
+        results_store.add(results)
+        yield results
+
+
+def _is_gil_enabled() -> bool:
+    """Whether the GIL is enabled, which is always the case before free-threaded Python builds."""
+    return getattr(sys, "_is_gil_enabled", lambda: True)()
+
+
+def _run_pairs_in_pool(
+    pending_pairs: List[Tuple[ValidationSpec, ModelSpec]],
+    n_jobs: int,
+    backend: Backend,
+    artefacts_store_dir: Union[str, None],
+    run_params: dict,
+    validation_registry_path: Optional[str],
+    model_registry_path: Optional[str],
+    max_memory_gb: Optional[float] = None,
+    timeout_secs: Optional[float] = None,
+    memory_limit_gb: Optional[float] = None,
+    max_tasks_per_child: Optional[int] = None,
+    results_store: Optional[store.ResultsStore] = None,
+    force_rerun: Optional[Union[Literal["all"], List[str]]] = None,
+    dataset_registry: Optional[Union[DatasetRegistry, str]] = None,
+) -> Iterator[Results]:
+    """Run validation-model pairs in a pool of workers, yielding results as they complete.
+
+    Results are added to `results_store`, if given, before being yielded. Pairs the store
+    contains by the time they would be submitted, e.g. stored by another concurrent run, are
+    skipped unless forced to rerun.
+
+    Pairs are started in the given order, as long as their resources fit in those left unused by
+    running pairs, otherwise later pairs that do fit are started first. Results are only collected
+    by the calling thread, so no locking of results is needed.
+
+    For the "isolated" backend, results are given a `status`, and failed pairs are recorded with
+    their `error` instead of raising.
+    """
+    resource_pool = scheduling.ResourcePool(cpus=n_jobs, memory_gb=max_memory_gb)
+    queued_pairs = list(pending_pairs)
+    running: dict = {}
+    with _make_executor(backend, n_jobs, memory_limit_gb, max_tasks_per_child) as executor:
+        try:
+            while queued_pairs or running:
+                for validation_spec, model_spec in _pop_startable_pairs(
+                    queued_pairs, resource_pool, n_jobs - len(running)
+                ):
+                    if results_store is not None and _stored_by_other_run(
+                        results_store, validation_spec, model_spec, force_rerun
+                    ):
+                        resource_pool.finish(_pair_resources(validation_spec, model_spec))
+                        continue
+                    logger.info(
+                        f"Submitting validation - model: {validation_spec.id} - {model_spec.id}"
+                    )
+                    future = _submit_pair(
+                        executor,
+                        backend,
+                        validation_spec,
+                        model_spec,
+                        artefacts_store_dir,
+                        run_params,
+                        validation_registry_path,
+                        model_registry_path,
+                        timeout_secs,
+                        dataset_registry,
+                    )
+                    running[future] = (validation_spec, model_spec)
+                done, _ = concurrent.futures.wait(
+                    running,
+                    timeout=_LAUNCH_POLL_SECS if queued_pairs else None,
+                    return_when=concurrent.futures.FIRST_COMPLETED,
+                )
+                for future in done:
+                    validation_spec, model_spec = running.pop(future)
+                    resource_pool.finish(_pair_resources(validation_spec, model_spec))
+                    results, elapsed_secs, status = _get_pair_outcome(future, backend)
+                    logger.info(
+                        f"Completed validation - model: {validation_spec.id} - {model_spec.id}"
+                    )
+                    results = _add_meta_data_to_results(
+                        results, elapsed_secs, validation_spec, model_spec, status
+                    )
+                    if results_store is not None:
+                        results_store.add(results)
+                    yield results
+        except BaseException:
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+
+
+def _make_executor(
+    backend: Backend,
+    n_jobs: int,
+    memory_limit_gb: Optional[float],
+    max_tasks_per_child: Optional[int],
+) -> concurrent.futures.Executor:
+    """Make the pool executor for the given backend."""
+    if backend == "thread":
+        return concurrent.futures.ThreadPoolExecutor(
+            max_workers=n_jobs, thread_name_prefix="kotsu"
+        )
+    if backend == "isolated":
+        return isolation.IsolatedExecutor(
+            max_workers=n_jobs,
+            memory_limit_gb=memory_limit_gb,
+            max_tasks_per_child=max_tasks_per_child,
+        )
+    return concurrent.futures.ProcessPoolExecutor(max_workers=n_jobs)
+
+
+def _get_pair_outcome(
+    future: concurrent.futures.Future, backend: Backend
+) -> Tuple[Results, float, Optional[str]]:
+    """Get the results of a finished pair's future.
+
+    Returns:
+        A tuple of (dict of results: Results type, elapsed time in seconds, status or None)
+    """
+    if backend != "isolated":
+        results, elapsed_secs = future.result()
+        return results, elapsed_secs, None
+    try:
+        results, elapsed_secs = future.result()
+    except error.IsolatedTaskFailed as e:
+        return {"error": str(e)}, e.elapsed_secs, e.status
+    return results, elapsed_secs, isolation.STATUS_OK
+
+
+def _pair_resources(validation_spec: ValidationSpec, model_spec: ModelSpec) -> Resources:
+    """The resources needed to run a validation-model pair."""
+    return scheduling.pair_resources(validation_spec.resources, model_spec.resources)
+
+
+def _pop_startable_pairs(
+    queued_pairs: List[Tuple[ValidationSpec, ModelSpec]],
+    resource_pool: scheduling.ResourcePool,
+    n_free_workers: int,
+) -> List[Tuple[ValidationSpec, ModelSpec]]:
+    """Pop the queued pairs that can be started now, recording their resources as used.
+
+    Exclusive pairs are never skipped over, so that they don't wait forever for all workers to be
+    free.
+    """
+    startable_pairs: List[Tuple[ValidationSpec, ModelSpec]] = []
+    for pair in list(queued_pairs):
+        if len(startable_pairs) >= n_free_workers:
+            break
+        resources = _pair_resources(*pair)
+        if resource_pool.can_start(resources):
+            resource_pool.start(resources)
+            queued_pairs.remove(pair)
+            startable_pairs.append(pair)
+        elif resources.exclusive:
+            break
+    return startable_pairs
+
+
+def _submit_pair(
+    executor: concurrent.futures.Executor,
+    backend: Backend,
+    validation_spec: ValidationSpec,
+    model_spec: ModelSpec,
+    artefacts_store_dir: Union[str, None],
+    run_params: dict,
+    validation_registry_path: Optional[str],
+    model_registry_path: Optional[str],
+    timeout_secs: Optional[float] = None,
+    dataset_registry: Optional[Union[DatasetRegistry, str]] = None,
+) -> concurrent.futures.Future:
+    """Submit a validation-model pair to run on the executor.
+
+    The dataset registry is sent to worker processes as given, i.e. by import path if it was
+    passed to `run` by import path.
+    """
+    if isinstance(executor, isolation.IsolatedExecutor):
+        return executor.submit_with_timeout(
+            _pair_timeout_secs(validation_spec, model_spec, timeout_secs),
+            _run_pair_in_worker,
+            _spec_ref(validation_spec, validation_registry_path),
+            _spec_ref(model_spec, model_registry_path),
+            artefacts_store_dir,
+            run_params,
+            dataset_registry,
+        )
+    if backend == "thread":
+        return executor.submit(
+            _make_and_run_validation_model,
+            validation_spec,
+            model_spec,
+            artefacts_store_dir,
+            run_params,
+            _resolve_registry(dataset_registry)[1],
+        )
+    return executor.submit(
+        _run_pair_in_worker,
+        _spec_ref(validation_spec, validation_registry_path),
+        _spec_ref(model_spec, model_registry_path),
+        artefacts_store_dir,
+        run_params,
+        dataset_registry,
+    )
+
+
+def _pair_timeout_secs(
+    validation_spec: ValidationSpec, model_spec: ModelSpec, timeout_secs: Optional[float]
+) -> Optional[float]:
+    """The shortest of the given timeout and those registered for the validation and model."""
+    timeouts = [
+        timeout
+        for timeout in [timeout_secs, validation_spec.timeout_secs, model_spec.timeout_secs]
+        if timeout is not None
+    ]
+    return min(timeouts, default=None)
+
+
+def _run_pair_in_worker(
+    validation_spec_ref: _SpecRef,
+    model_spec_ref: _SpecRef,
+    artefacts_store_dir: Union[str, None],
+    run_params: dict,
+    dataset_registry: Optional[Union[DatasetRegistry, str]] = None,
+) -> Tuple[Results, float]:
+    """Entry point for running a validation-model pair within a worker process."""
+    return _make_and_run_validation_model(
+        _deref_spec(validation_spec_ref),
+        _deref_spec(model_spec_ref),
+        artefacts_store_dir,
+        run_params,
+        _resolve_registry(dataset_registry)[1],
+    )
+
+
+def _make_and_run_validation_model(
+    validation_spec: ValidationSpec,
+    model_spec: ModelSpec,
+    artefacts_store_dir: Union[str, None],
+    run_params: dict,
+    dataset_registry: Optional[DatasetRegistry] = None,
+) -> Tuple[Results, float]:
+    """Make the validation and model of a pair from their specs, and run them."""
+    validation, model = _make_validation_model(
+        validation_spec, model_spec, artefacts_store_dir, dataset_registry
+    )
+    return _run_validation_model(validation, model, run_params)
+
+
+def _make_validation_model(
+    validation_spec: ValidationSpec,
+    model_spec: ModelSpec,
+    artefacts_store_dir: Union[str, None],
+    dataset_registry: Optional[DatasetRegistry] = None,
+) -> Tuple[Validation, Model]:
+    """Make the validation and model of a pair from their specs, passing them their datasets."""
+    validation = validation_spec.make(**_dataset_kwargs(validation_spec, dataset_registry))
+    validation = _form_validation_partial_with_store_dirs(
+        validation,
+        artefacts_store_dir,
+        validation_spec,
+        model_spec,
+    )
+    model = model_spec.make(**_dataset_kwargs(model_spec, dataset_registry))
+    return validation, model
+
+
+def _dataset_kwargs(spec: _Spec, dataset_registry: Optional[DatasetRegistry]) -> dict:
+    """Materialize the datasets registered for a spec, as kwargs to make it with."""
+    if not spec.datasets:
+        return {}
+    if dataset_registry is None:
+        raise ValueError(f"{spec.id} is registered with datasets, but no dataset_registry given.")
+    return {
+        kwarg: dataset_registry.materialize(dataset_id)
+        for kwarg, dataset_id in spec.datasets.items()
+    }
+
+
+def _cache_datasets(
+    pending_pairs: List[Tuple[ValidationSpec, ModelSpec]], dataset_registry: DatasetRegistry
+):
+    """Materialize the datasets used by pairs into the registry's cache, before running them.
+
+    So that parallel workers each load the cached datasets memory-mapped, rather than each
+    making them.
+    """
+    dataset_ids = {
+        dataset_id
+        for pair in pending_pairs
+        for spec in pair
+        for dataset_id in spec.datasets.values()
+    }
+    for dataset_id in sorted(dataset_ids):
+        dataset_registry.materialize(dataset_id)
+
+
+async def _arun_validation_model(
+    validation_spec: ValidationSpec,
+    model_spec: ModelSpec,
+    artefacts_store_dir: Union[str, None],
+    run_params: dict,
+    executor: Optional[concurrent.futures.Executor],
+    dataset_registry: Optional[DatasetRegistry] = None,
+) -> Tuple[Results, float]:
+    """Make and run a validation-model pair, awaiting coroutine validations in the event loop.
+
+    Returns:
+        A tuple of (dict of results: Results type, elapsed time in seconds)
+    """
+    loop = asyncio.get_running_loop()
+    validation, model = await loop.run_in_executor(
+        executor,
+        _make_validation_model,
+        validation_spec,
+        model_spec,
+        artefacts_store_dir,
+        dataset_registry,
     )
-    return results_df
+    if not inspect.iscoroutinefunction(validation):
+        return await loop.run_in_executor(
+            executor, _run_validation_model, validation, model, run_params
+        )
+    start_time = time.time()
+    results = await validation(model, **run_params)
+    elapsed_secs = time.time() - start_time
+    return results, elapsed_secs
 
 
 def _form_validation_partial_with_store_dirs(
@@ -115,12 +914,13 @@ def _form_validation_partial_with_store_dirs(
 ):
     """Form a partial of the validation with formed validation and model artefacts dirs if needed.
 
-    Also makes any needed dirs for the artefacts dirs.
+    Also makes any needed dirs for the artefacts dirs. Safe to call from concurrent threads.
     """
     if artefacts_store_dir is not None:
         validation_artefacts_dir = os.path.join(artefacts_store_dir, f"{validation_spec.id}/")
         model_artefacts_dir = os.path.join(validation_artefacts_dir, f"{model_spec.id}/")
-        os.makedirs(model_artefacts_dir, exist_ok=True)
+        with _makedirs_lock:
+            os.makedirs(model_artefacts_dir, exist_ok=True)
         validation = functools.partial(
             validation,
             validation_artefacts_dir=validation_artefacts_dir,
@@ -136,13 +936,19 @@ def _add_meta_data_to_results(
     elapsed_secs: float,
     validation_spec: ValidationSpec,
     model_spec: ModelSpec,
+    status: Optional[str] = None,
 ) -> Results:
-    """Add meta data to results, raising if keys clash."""
+    """Add meta data to results, raising if keys clash.
+
+    The status of the run is only added when given, i.e. when running isolated.
+    """
     results_meta_data: Results = {
         "validation_id": validation_spec.id,
         "model_id": model_spec.id,
         "runtime_secs": elapsed_secs,
     }
+    if status is not None:
+        results_meta_data["status"] = status
     if bool(set(results) & set(results_meta_data)):
         raise ValueError(
             (
@@ -0,0 +1,196 @@
+"""Scheduling of validation-model combinations using the runtimes of prior runs."""
+
+from typing import List, Optional, Sequence, Tuple, TypeVar
+
+import heapq
+import logging
+import math
+import os
+
+import pandas as pd
+
+from kotsu.registration import Resources
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Launches are held back while the system's available memory is below this fraction of its total
+_MEMORY_PRESSURE_FRACTION = 0.05
+
+
+def estimate_runtimes(
+    pair_ids: Sequence[Tuple[str, str]], results_df: pd.DataFrame
+) -> List[float]:
+    """Estimate the runtime of validation-model pairs from the `runtime_secs` of prior results.
+
+    Estimates are, in order of preference:
+        - the prior runtime of the same pair
+        - for pairs with both a prior result of the same model and of the same validation;
+          `model_mean * validation_mean / overall_mean`, i.e. assuming a model's runtime scales
+          with how expensive the validation is
+        - the mean prior runtime of the same model, or of the same validation
+        - the median prior runtime of all pairs
+        - NaN, if there are no prior results at all
+
+    Args:
+        pair_ids: The (validation ID, model ID) of the pairs to estimate runtimes for.
+        results_df: Results of prior runs, with columns `validation_id`, `model_id` and
+            `runtime_secs`.
+
+    Returns:
+        Estimated runtime in seconds for each pair, in the order given.
+    """
+    prior = pd.DataFrame(
+        {
+            "validation_id": results_df["validation_id"].to_numpy(),
+            "model_id": results_df["model_id"].to_numpy(),
+            "runtime_secs": pd.to_numeric(results_df["runtime_secs"].to_numpy(), errors="coerce"),
+        }
+    ).dropna(subset=["runtime_secs"])
+    pairs = pd.DataFrame(list(pair_ids), columns=["validation_id", "model_id"])
+    if prior.empty:
+        return [math.nan] * len(pairs)
+
+    pair_means = prior.groupby(["validation_id", "model_id"])["runtime_secs"].mean()
+    validation_means = prior.groupby("validation_id")["runtime_secs"].mean()
+    model_means = prior.groupby("model_id")["runtime_secs"].mean()
+    overall_mean = prior["runtime_secs"].mean()
+
+    pair_index = pd.MultiIndex.from_frame(pairs)
+    pair_estimates = pd.Series(pair_means.reindex(pair_index).to_numpy())
+    validation_estimates = pd.Series(validation_means.reindex(pairs["validation_id"]).to_numpy())
+    model_estimates = pd.Series(model_means.reindex(pairs["model_id"]).to_numpy())
+    if overall_mean > 0:
+        scaled_estimates = model_estimates * validation_estimates / overall_mean
+    else:
+        scaled_estimates = pd.Series(math.nan, index=pairs.index)
+
+    estimates = (
+        pair_estimates.fillna(scaled_estimates)
+        .fillna(model_estimates)
+        .fillna(validation_estimates)
+        .fillna(prior["runtime_secs"].median())
+    )
+    return [float(estimate) for estimate in estimates]
+
+
+def order_longest_first(items: Sequence[T], estimates: Sequence[float]) -> List[T]:
+    """Order items by descending estimated runtime, keeping the given order for ties and NaNs."""
+    keyed = sorted(
+        range(len(items)),
+        key=lambda i: -estimates[i] if not math.isnan(estimates[i]) else math.inf,
+    )
+    return [items[i] for i in keyed]
+
+
+def predict_makespan(estimates: Sequence[float], n_workers: int) -> float:
+    """Predict the total runtime of running pairs in the given order on `n_workers` workers.
+
+    Simulates each pair starting on whichever worker becomes free first. NaN if any estimate is
+    unknown.
+    """
+    if any(math.isnan(estimate) for estimate in estimates):
+        return math.nan
+    worker_finish_times = [0.0] * min(n_workers, len(estimates))
+    for estimate in estimates:
+        heapq.heapreplace(worker_finish_times, worker_finish_times[0] + estimate)
+    return max(worker_finish_times, default=0.0)
+
+
+def pair_resources(validation_resources: Resources, model_resources: Resources) -> Resources:
+    """Combine the resources of a validation and a model into those of running them as a pair.
+
+    They run in the same worker, so share CPUs but each need their own memory.
+    """
+    return Resources(
+        cpus=max(validation_resources.cpus, model_resources.cpus),
+        memory_gb=validation_resources.memory_gb + model_resources.memory_gb,
+        exclusive=validation_resources.exclusive or model_resources.exclusive,
+    )
+
+
+def total_memory_gb() -> Optional[float]:
+    """The total physical memory of the system in GB, or None if unknown."""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024**3
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def available_memory_gb() -> Optional[float]:
+    """The memory currently available to start new processes in GB, or None if unknown."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024**2
+    except OSError:
+        pass
+    return None
+
+
+class ResourcePool:
+    """Tracks resources of running validation-model pairs against the capacity of the machine.
+
+    A pair can start when it fits in the CPUs and memory not used by already running pairs, no
+    exclusive pair is running, and the system isn't under memory pressure. A pair can always start
+    when nothing is running, so that pairs needing more than the capacity still run, alone.
+
+    Args:
+        cpus: The number of CPUs that running pairs can use in total.
+        memory_gb: The memory in GB that running pairs can use in total. Defaults to the total
+            memory of the system.
+    """
+
+    def __init__(self, cpus: float, memory_gb: Optional[float] = None):
+        self.cpus = cpus
+        self.memory_gb = total_memory_gb() if memory_gb is None else memory_gb
+        self._total_memory_gb = total_memory_gb()
+        self.used_cpus = 0.0
+        self.used_memory_gb = 0.0
+        self.n_running = 0
+        self.n_exclusive_running = 0
+
+    def can_start(self, resources: Resources) -> bool:
+        """Whether a pair needing `resources` can start now."""
+        if self.n_running == 0:
+            return True
+        if resources.exclusive or self.n_exclusive_running:
+            return False
+        if self.used_cpus + resources.cpus > self.cpus:
+            return False
+        if (
+            self.memory_gb is not None
+            and self.used_memory_gb + resources.memory_gb > self.memory_gb
+        ):
+            return False
+        return not self._under_memory_pressure(resources)
+
+    def start(self, resources: Resources):
+        """Record a pair needing `resources` as running."""
+        self.used_cpus += resources.cpus
+        self.used_memory_gb += resources.memory_gb
+        self.n_running += 1
+        self.n_exclusive_running += int(resources.exclusive)
+
+    def finish(self, resources: Resources):
+        """Record a pair needing `resources` as finished."""
+        self.used_cpus -= resources.cpus
+        self.used_memory_gb -= resources.memory_gb
+        self.n_running -= 1
+        self.n_exclusive_running -= int(resources.exclusive)
+
+    def _under_memory_pressure(self, resources: Resources) -> bool:
+        available = available_memory_gb()
+        if available is None or self._total_memory_gb is None:
+            return False
+        reserve = _MEMORY_PRESSURE_FRACTION * self._total_memory_gb
+        if available - resources.memory_gb < reserve:
+            logger.debug(
+                f"Holding back launch needing {resources.memory_gb} GB, as only "
+                f"{available:.1f} GB of memory available."
+            )
+            return True
+        return False
@@ -1,11 +1,366 @@
 """Functionality for storing validation results."""
 
-from typing import List
+from typing import Iterator, List, Optional
+from kotsu.typing import Results
+
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import urllib.parse
 
 import pandas as pd
 
 
+logger = logging.getLogger(__name__)
+
+# Columns identifying a results row
+KEY_COLUMNS = ["validation_id", "model_id"]
+
+# Columns of results meta data, which are put first in stored results
+META_COLUMNS = ["validation_id", "model_id", "runtime_secs"]
+
+
 def write(df: pd.DataFrame, results_path: str, to_front_cols: List[str]):
-    """Write the results to the results path."""
+    """Write the results to the results path.
+
+    Written to a temporary file that then replaces the results path, so that the results path is
+    never left partially written.
+    """
     df = df[to_front_cols + [col for col in df.columns if col not in to_front_cols]]
-    df.to_csv(results_path, index=False)
+    tmp_path = f"{results_path}.tmp"
+    with open(tmp_path, "w", newline="") as f:
+        df.to_csv(f, index=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, results_path)
+
+
+class ResultsStore:
+    """A store of results, keyed by validation and model ID.
+
+    While running, each result is added with `add` as soon as it completes, and then all new
+    results are merged in with `merge` once the run completes. By default added results are
+    appended to a log next to the store path, so they can be recovered with `recover` if the run
+    doesn't complete.
+
+    Args:
+        path: The file or directory path results are stored at.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def read(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Read stored results, only reading `columns` if given.
+
+        Returns an empty dataframe with the meta data columns if there are no stored results.
+        """
+        raise NotImplementedError
+
+    def add(self, results: Results):
+        """Durably record a results row as soon as it completes."""
+        append_to_log(results, log_path(self.path))
+
+    def recover(self) -> List[Results]:
+        """Get results added by prior runs that didn't complete, which are yet to be merged."""
+        return read_log(log_path(self.path))
+
+    def contains(self, validation_id: str, model_id: str) -> bool:
+        """Whether results for a pair have been stored since the store was read.
+
+        Only stores that can be shared by concurrent runs check, otherwise this is always False.
+        """
+        return False
+
+    def merge(self, results_list: List[Results]) -> pd.DataFrame:
+        """Merge new results into the stored results, overwriting any with the same key.
+
+        Also clears the log of added results, as they are now all stored.
+
+        Returns:
+            pd.DataFrame: all stored results, sorted by key.
+        """
+        results_df = self._merge(results_list)
+        clear_log(log_path(self.path))
+        return results_df
+
+    def _merge(self, results_list: List[Results]) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.path!r})"
+
+
+class CSVStore(ResultsStore):
+    """Store of results in a single CSV file."""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._df: Optional[pd.DataFrame] = None
+
+    def read(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Read stored results, only returning `columns` if given.
+
+        The whole file is always read, and kept for merging new results into.
+        """
+        try:
+            self._df = pd.read_csv(self.path)
+        except FileNotFoundError:
+            self._df = _empty_results_df()
+        if columns is not None:
+            return self._df[columns]
+        return self._df
+
+    def _merge(self, results_list: List[Results]) -> pd.DataFrame:
+        """Merge new results into the stored results, rewriting the whole file."""
+        results_df = self._df if self._df is not None else self.read()
+        results_df = _replace_rows(results_df, pd.DataFrame.from_records(results_list))
+        results_df = results_df.sort_values(by=KEY_COLUMNS).reset_index(drop=True)
+        write(results_df, self.path, to_front_cols=META_COLUMNS)
+        self._df = results_df
+        return results_df
+
+
+class ParquetStore(ResultsStore):
+    """Store of results in a directory of Parquet files, one per validation ID.
+
+    Merging new results only rewrites the files of the validations they are for, and reading
+    only some columns only reads those columns from disk. Column dtypes are kept between runs.
+    Needs `pyarrow` to be installed.
+    """
+
+    def read(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Read stored results, only reading `columns` if given."""
+        try:
+            partition_names = sorted(os.listdir(self.path))
+        except FileNotFoundError:
+            partition_names = []
+        partition_dfs = [
+            self._read_partition(os.path.join(self.path, name), columns)
+            for name in partition_names
+            if not name.startswith(".")
+        ]
+        if not partition_dfs:
+            results_df = _empty_results_df()
+            return results_df[columns] if columns is not None else results_df
+        results_df = pd.concat(partition_dfs, ignore_index=True)
+        if columns is None:
+            results_df = results_df[
+                META_COLUMNS + [col for col in results_df.columns if col not in META_COLUMNS]
+            ]
+        return results_df
+
+    def _merge(self, results_list: List[Results]) -> pd.DataFrame:
+        """Merge new results into the stored results, rewriting only the affected partitions."""
+        additional_results_df = pd.DataFrame.from_records(results_list)
+        if not additional_results_df.empty:
+            os.makedirs(self.path, exist_ok=True)
+            for validation_id, validation_results_df in additional_results_df.groupby(
+                "validation_id", sort=False
+            ):
+                self._merge_partition(validation_id, validation_results_df)
+        return self.read().sort_values(by=KEY_COLUMNS).reset_index(drop=True)
+
+    def _partition_path(self, validation_id: str) -> str:
+        return os.path.join(self.path, urllib.parse.quote(validation_id, safe=""))
+
+    def _read_partition(self, partition_path: str, columns: Optional[List[str]]) -> pd.DataFrame:
+        return pd.read_parquet(os.path.join(partition_path, "results.parquet"), columns=columns)
+
+    def _merge_partition(self, validation_id: str, validation_results_df: pd.DataFrame):
+        # Columns that are all missing are for results of other validations in the same merge
+        validation_results_df = validation_results_df.dropna(axis="columns", how="all")
+        partition_path = self._partition_path(validation_id)
+        try:
+            prior_df = self._read_partition(partition_path, None)
+            validation_results_df = _replace_rows(prior_df, validation_results_df)
+        except FileNotFoundError:
+            os.makedirs(partition_path, exist_ok=True)
+            validation_results_df = validation_results_df.drop_duplicates(
+                subset=KEY_COLUMNS, keep="last"
+            )
+        validation_results_df = validation_results_df.sort_values(by="model_id")
+        validation_results_df = validation_results_df[
+            META_COLUMNS
+            + [col for col in validation_results_df.columns if col not in META_COLUMNS]
+        ]
+        file_path = os.path.join(partition_path, "results.parquet")
+        tmp_path = f"{file_path}.tmp"
+        validation_results_df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, file_path)
+
+
+class SQLiteStore(ResultsStore):
+    """Store of results in a SQLite database file.
+
+    Results are upserted in a transaction as soon as each completes, so no separate log is kept,
+    and checking for stored results of a pair is an indexed lookup. SQLite's locking lets
+    concurrent runs on the same machine share the store; pairs stored by another run since this
+    run read the store are skipped.
+
+    The meta data columns are stored as table columns, and the other results as a JSON object.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS results (
+            validation_id TEXT NOT NULL,
+            model_id TEXT NOT NULL,
+            runtime_secs REAL,
+            results TEXT NOT NULL,
+            PRIMARY KEY (validation_id, model_id)
+        )
+    """
+
+    def __init__(self, path: str, timeout_secs: float = 60):
+        super().__init__(path)
+        self.timeout_secs = timeout_secs
+
+    def read(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Read stored results, only parsing other results than the meta data if needed."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT validation_id, model_id, runtime_secs, results FROM results "
+                "ORDER BY validation_id, model_id"
+            ).fetchall()
+        if not rows:
+            results_df = _empty_results_df()
+            return results_df[columns] if columns is not None else results_df
+        results_df = pd.DataFrame([row[:3] for row in rows], columns=META_COLUMNS)
+        if columns is None or not set(columns) <= set(META_COLUMNS):
+            other_results_df = pd.DataFrame.from_records([json.loads(row[3]) for row in rows])
+            results_df = pd.concat([results_df, other_results_df], axis="columns")
+        if columns is not None:
+            results_df = results_df.reindex(columns=columns)
+        return results_df
+
+    def add(self, results: Results):
+        """Upsert a results row in its own transaction."""
+        self._upsert([results])
+
+    def recover(self) -> List[Results]:
+        """Nothing to recover, as added results are already stored."""
+        return []
+
+    def contains(self, validation_id: str, model_id: str) -> bool:
+        """Whether results for a pair are stored, e.g. by another concurrent run."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM results WHERE validation_id = ? AND model_id = ?",
+                (validation_id, model_id),
+            ).fetchone()
+        return row is not None
+
+    def _merge(self, results_list: List[Results]) -> pd.DataFrame:
+        """Upsert any results not already added, and read all results."""
+        self._upsert(results_list)
+        return self.read()
+
+    def _upsert(self, results_list: List[Results]):
+        rows = [
+            (
+                results["validation_id"],
+                results["model_id"],
+                results.get("runtime_secs"),
+                json.dumps(
+                    {key: value for key, value in results.items() if key not in META_COLUMNS},
+                    default=_json_default,
+                ),
+            )
+            for results in results_list
+        ]
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", rows)
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connect to the database for a transaction, creating the results table if needed."""
+        conn = sqlite3.connect(self.path, timeout=self.timeout_secs)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.execute(self._SCHEMA)
+                yield conn
+        finally:
+            conn.close()
+
+
+def get_store(results_path: str) -> ResultsStore:
+    """Get the store of results for a results path, chosen by its extension.
+
+    Paths ending in `.parquet` are stored in a ParquetStore, paths ending in `.sqlite`, `.sqlite3`
+    or `.db` in a SQLiteStore, and otherwise in a CSVStore.
+    """
+    if results_path.rstrip("/").endswith(".parquet"):
+        return ParquetStore(results_path)
+    if results_path.endswith((".sqlite", ".sqlite3", ".db")):
+        return SQLiteStore(results_path)
+    return CSVStore(results_path)
+
+
+def log_path(results_path: str) -> str:
+    """The path of the log of results written next to the results path while running."""
+    return f"{results_path}.wal"
+
+
+def append_to_log(results: Results, path: str):
+    """Append a results row to the log at path, durably on disk before returning."""
+    line = json.dumps(results, default=_json_default)
+    with open(path, "a") as f:
+        f.write(line + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_log(path: str) -> List[Results]:
+    """Read the results rows in the log at path, or none if there is no log.
+
+    Lines that can't be parsed, e.g. a line partially written when a run was killed, are skipped.
+    """
+    results_list = []
+    try:
+        with open(path) as f:
+            for line_number, line in enumerate(f, start=1):
+                try:
+                    results_list.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping unreadable line {line_number} of results log {path}")
+    except FileNotFoundError:
+        pass
+    return results_list
+
+
+def clear_log(path: str):
+    """Remove the log at path, if any."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _replace_rows(results_df: pd.DataFrame, additional_results_df: pd.DataFrame) -> pd.DataFrame:
+    """Add rows of new results to prior results, replacing prior rows with the same key.
+
+    Only prior rows with keys in the new results are dropped, rather than deduplicating all rows.
+    """
+    if additional_results_df.empty:
+        return results_df
+    additional_results_df = additional_results_df.drop_duplicates(subset=KEY_COLUMNS, keep="last")
+    is_replaced = pd.MultiIndex.from_frame(results_df[KEY_COLUMNS]).isin(
+        pd.MultiIndex.from_frame(additional_results_df[KEY_COLUMNS])
+    )
+    return pd.concat([results_df[~is_replaced], additional_results_df], ignore_index=True)
+
+
+def _empty_results_df() -> pd.DataFrame:
+    results_df = pd.DataFrame(columns=META_COLUMNS)
+    results_df["runtime_secs"] = results_df["runtime_secs"].astype(int)
+    return results_df
+
+
+def _json_default(value):
+    """Convert values such as numpy scalars, which the json module can't, for writing to logs."""
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
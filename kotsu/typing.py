@@ -18,6 +18,10 @@ Results = Dict[str, Union[float, str]]
 # have an interface compatible with their Validations.
 Model = Any
 
+# Datasets within kotsu are not constrained in any way, but NumPy arrays within them (including
+# within nested dicts, lists and tuples) are memory-mapped when datasets are cached on disk.
+Dataset = Any
+
 # A Validation is a callable (e.g. function) that takes a Model, and returns a Results.
 Validation = Callable[..., Results]
 
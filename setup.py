@@ -11,6 +11,7 @@ with open(REPO_ROOT / "README.md", encoding="utf-8") as f:
     README = f.read()
 
 REQUIREMENTS = ["pandas", "typing_extensions"]
+EXTRAS_REQUIREMENTS = {"parquet": ["pyarrow"]}
 
 setup(
     name="kotsu",
@@ -24,6 +25,7 @@ setup(
     license="MIT",
     packages=find_packages(),
     install_requires=REQUIREMENTS,
+    extras_require=EXTRAS_REQUIREMENTS,
     python_requires=">=3.9",
     cmdclass=versioneer.get_cmdclass(),
 )
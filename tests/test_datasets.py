@@ -0,0 +1,40 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from kotsu import datasets
+
+
+def test_save_and_load_memory_maps_arrays(tmpdir):
+    dataset = {
+        "X": np.arange(12.0).reshape(4, 3),
+        "splits": [(np.array([0, 1]), np.array([2, 3]))],
+        "df": pd.DataFrame({"a": [1, 2]}),
+        "name": "fake",
+    }
+    path = datasets.cache_path(str(tmpdir), "fake/dataset-v1")
+    assert os.path.dirname(path) == str(tmpdir)
+    assert not datasets.exists(path)
+
+    datasets.save(dataset, path)
+    assert datasets.exists(path)
+    loaded = datasets.load(path)
+
+    assert isinstance(loaded["X"], np.memmap)
+    assert not loaded["X"].flags.writeable
+    np.testing.assert_array_equal(loaded["X"], dataset["X"])
+    train, test = loaded["splits"][0]
+    assert isinstance(train, np.memmap)
+    np.testing.assert_array_equal(test, [2, 3])
+    pd.testing.assert_frame_equal(loaded["df"], dataset["df"])
+    assert loaded["name"] == "fake"
+
+
+def test_save_keeps_dataset_saved_first(tmpdir):
+    path = datasets.cache_path(str(tmpdir), "dataset-v1")
+    datasets.save(np.zeros(3), path)
+    datasets.save(np.ones(3), path)
+
+    np.testing.assert_array_equal(datasets.load(path), np.zeros(3))
+    assert os.listdir(str(tmpdir)) == ["dataset-v1"]
@@ -0,0 +1,84 @@
+import os
+import signal
+import time
+
+import pytest
+
+from kotsu import error, isolation
+
+
+def get_pid():
+    return os.getpid()
+
+
+def sleep(secs):
+    time.sleep(secs)
+    return secs
+
+
+def raise_error():
+    raise RuntimeError("task failed")
+
+
+def segfault():
+    os.kill(os.getpid(), signal.SIGSEGV)
+
+
+def allocate(gb):
+    data = bytearray(int(gb * 1024**3))
+    time.sleep(1)
+    return len(data)
+
+
+def test_isolated_executor_runs_tasks():
+    with isolation.IsolatedExecutor(max_workers=2) as executor:
+        futures = [executor.submit(sleep, 0.01 * i) for i in range(4)]
+        pid_future = executor.submit(get_pid)
+    assert [future.result() for future in futures] == [0, 0.01, 0.02, 0.03]
+    assert pid_future.result() != os.getpid()
+
+
+@pytest.mark.parametrize(
+    "fn, args, kwargs, expected_status",
+    [
+        (raise_error, (), {}, isolation.STATUS_ERROR),
+        (segfault, (), {}, isolation.STATUS_CRASHED),
+        (sleep, (10,), {"timeout_secs": 0.2}, isolation.STATUS_TIMEOUT),
+        (allocate, (0.2,), {"memory_limit_gb": 0.1}, isolation.STATUS_MEMORY_LIMIT),
+    ],
+)
+def test_isolated_executor_failures(fn, args, kwargs, expected_status):
+    with isolation.IsolatedExecutor(
+        max_workers=1, memory_limit_gb=kwargs.get("memory_limit_gb")
+    ) as executor:
+        failing_future = executor.submit_with_timeout(kwargs.get("timeout_secs"), fn, *args)
+        following_future = executor.submit(sleep, 0)
+
+    with pytest.raises(error.IsolatedTaskFailed) as exc_info:
+        failing_future.result()
+    assert exc_info.value.status == expected_status
+    if expected_status == isolation.STATUS_TIMEOUT:
+        assert exc_info.value.elapsed_secs < 5
+    # Following tasks still run, in a replaced process when needed
+    assert following_future.result() == 0
+
+
+@pytest.mark.parametrize("max_tasks_per_child, expected_n_pids", [(None, 1), (1, 3), (2, 2)])
+def test_isolated_executor_max_tasks_per_child(max_tasks_per_child, expected_n_pids):
+    with isolation.IsolatedExecutor(
+        max_workers=1, max_tasks_per_child=max_tasks_per_child
+    ) as executor:
+        futures = [executor.submit(get_pid) for _ in range(3)]
+    assert len({future.result() for future in futures}) == expected_n_pids
+
+
+def test_isolated_executor_cancel_futures():
+    executor = isolation.IsolatedExecutor(max_workers=1)
+    running_future = executor.submit(sleep, 0.2)
+    queued_future = executor.submit(sleep, 0)
+    time.sleep(0.1)
+    executor.shutdown(wait=True, cancel_futures=True)
+    assert running_future.result() == 0.2
+    assert queued_future.cancelled()
+    with pytest.raises(RuntimeError):
+        executor.submit(sleep, 0)
@@ -1,3 +1,6 @@
+import pickle
+
+import numpy as np
 import pytest
 
 from kotsu import error, registration
@@ -114,3 +117,45 @@ def test_malformed_entity_id(bad_id):
 
     with pytest.raises(ValueError, match=r"Attempted to register malformed entity ID"):
         registry.register(bad_id, "fake_entry_point")
+
+
+@pytest.mark.parametrize(
+    "resources, expected",
+    [
+        (None, registration.Resources(cpus=1, memory_gb=0, exclusive=False)),
+        ({"memory_gb": 30, "exclusive": True}, registration.Resources(1, 30, True)),
+        (registration.Resources(cpus=4), registration.Resources(4, 0, False)),
+    ],
+)
+def test_register_resources(resources, expected):
+    registry = registration._Registry()
+
+    registry.register("Entity-v0", "fake_entry_point", resources=resources)
+    assert registry.entity_specs["Entity-v0"].resources == expected
+
+
+def test_dataset_registry_materializes_once(mocker):
+    loader = mocker.Mock(return_value="DATASET")
+    dataset_registry = registration.DatasetRegistry()
+    dataset_registry.register("dataset-v1", entry_point=loader, kwargs={"param": 1})
+
+    assert dataset_registry.materialize("dataset-v1") == "DATASET"
+    assert dataset_registry.materialize("dataset-v1") == "DATASET"
+    loader.assert_called_once_with(param=1)
+
+
+def fake_array_loader(size):
+    return {"X": np.arange(size)}
+
+
+def test_dataset_registry_caches_on_disk(mocker, tmpdir):
+    dataset_registry = registration.DatasetRegistry(cache_dir=str(tmpdir))
+    dataset_registry.register("dataset-v1", entry_point=fake_array_loader, kwargs={"size": 5})
+    dataset = dataset_registry.materialize("dataset-v1")
+    assert isinstance(dataset["X"], np.memmap)
+
+    unpickled_registry = pickle.loads(pickle.dumps(dataset_registry))
+    patched_make = mocker.patch.object(unpickled_registry, "make")
+    dataset = unpickled_registry.materialize("dataset-v1")
+    np.testing.assert_array_equal(dataset["X"], np.arange(5))
+    patched_make.assert_not_called()
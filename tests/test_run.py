@@ -1,6 +1,11 @@
+import asyncio
 import logging
+import os
+import threading
+import time
 from unittest import mock
 
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -19,6 +24,7 @@ class FakeRegistry:
             entity = mock.Mock()
             entity.id = id_
             entity.deprecated = False
+            entity.datasets = {}
             entitys.append(entity)
             instance = mock.Mock()
             instance.return_value = {}
@@ -255,3 +261,531 @@ def test_raise_if_valiation_returns_privilidged_key_name(result, mocker, tmpdir)
             validation_registry,
             results_path=results_path,
         )
+
+
+def fake_model_factory(param):
+    return param
+
+
+def fake_validation_factory(offset):
+    def fake_validation(model, validation_artefacts_dir=None, model_artefacts_dir=None):
+        return {"score": model + offset, "pid": os.getpid()}
+
+    return fake_validation
+
+
+parallel_model_registry = kotsu.registration.ModelRegistry()
+for _param in range(3):
+    parallel_model_registry.register(
+        id=f"model_{_param}-v1", entry_point=fake_model_factory, kwargs={"param": _param}
+    )
+
+parallel_validation_registry = kotsu.registration.ValidationRegistry()
+for _offset in [10, 20]:
+    parallel_validation_registry.register(
+        id=f"validation_{_offset}-v1",
+        entry_point=fake_validation_factory,
+        kwargs={"offset": _offset},
+    )
+
+
+@pytest.mark.parametrize(
+    "model_registry, validation_registry",
+    [
+        (parallel_model_registry, parallel_validation_registry),
+        ("tests.test_run:parallel_model_registry", "tests.test_run:parallel_validation_registry"),
+    ],
+)
+def test_run_in_process_pool(model_registry, validation_registry, tmpdir):
+    results_path = str(tmpdir) + "validation_results.csv"
+    out_df = kotsu.run.run(
+        model_registry,
+        validation_registry,
+        results_path=results_path,
+        artefacts_store_dir=str(tmpdir) + "/artefacts/",
+        n_jobs=2,
+        backend="process",
+    )
+
+    assert len(out_df) == 6
+    assert list(out_df["validation_id"]) == ["validation_10-v1"] * 3 + ["validation_20-v1"] * 3
+    assert list(out_df["model_id"]) == ["model_0-v1", "model_1-v1", "model_2-v1"] * 2
+    assert list(out_df["score"]) == [10, 11, 12, 20, 21, 22]
+    assert (out_df["pid"] != os.getpid()).all()
+    pd.testing.assert_frame_equal(pd.read_csv(results_path), out_df)
+
+
+def test_run_in_process_pool_skips_prior_results(mocker, tmpdir):
+    results_path = str(tmpdir) + "validation_results.csv"
+    kotsu.run.run(parallel_model_registry, parallel_validation_registry, results_path=results_path)
+
+    patched_process_pool = mocker.patch("kotsu.run._run_pairs_in_pool", return_value=[])
+    kotsu.run.run(
+        parallel_model_registry, parallel_validation_registry, results_path=results_path, n_jobs=2
+    )
+    assert patched_process_pool.call_args[0][0] == []
+
+
+def test_run_raises_on_bad_n_jobs():
+    with pytest.raises(ValueError, match=r"n_jobs must be"):
+        kotsu.run.run(FakeRegistry([]), FakeRegistry([]), n_jobs=0)
+
+
+def test_run_in_thread_pool(tmpdir):
+    unpicklable_model_registry = kotsu.registration.ModelRegistry()
+    for param in range(3):
+        unpicklable_model_registry.register(
+            id=f"model_{param}-v1", entry_point=lambda param: param, kwargs={"param": param}
+        )
+
+    results_path = str(tmpdir) + "validation_results.csv"
+    out_df = kotsu.run.run(
+        unpicklable_model_registry,
+        parallel_validation_registry,
+        results_path=results_path,
+        artefacts_store_dir=str(tmpdir) + "/artefacts/",
+        n_jobs=3,
+        backend="thread",
+    )
+
+    assert list(out_df["score"]) == [10, 11, 12, 20, 21, 22]
+    assert (out_df["pid"] == os.getpid()).all()
+    for validation_id, model_id in zip(out_df["validation_id"], out_df["model_id"]):
+        assert os.path.isdir(str(tmpdir) + f"/artefacts/{validation_id}/{model_id}/")
+    pd.testing.assert_frame_equal(pd.read_csv(results_path), out_df)
+
+
+@pytest.mark.parametrize("gil_enabled, expected_backend", [(True, "process"), (False, "thread")])
+def test_default_backend(gil_enabled, expected_backend, mocker):
+    _ = mocker.patch("kotsu.store.write")
+    mocker.patch("kotsu.run._is_gil_enabled", return_value=gil_enabled)
+    patched_pool = mocker.patch("kotsu.run._run_pairs_in_pool", return_value=[])
+
+    kotsu.run.run(FakeRegistry(["model_1"]), FakeRegistry(["validation_1"]), n_jobs=2)
+
+    assert patched_pool.call_args[0][2] == expected_backend
+
+
+def test_arun_awaits_coroutine_validations_concurrently(tmpdir):
+    running = {"now": 0, "max": 0}
+
+    def factory_async_validation(offset):
+        async def async_validation(model, validation_artefacts_dir=None, model_artefacts_dir=None):
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+            await asyncio.sleep(0.05)
+            running["now"] -= 1
+            return {"score": model + offset}
+
+        return async_validation
+
+    async_validation_registry = kotsu.registration.ValidationRegistry()
+    for offset in [10, 20]:
+        async_validation_registry.register(
+            id=f"validation_{offset}-v1",
+            entry_point=factory_async_validation,
+            kwargs={"offset": offset},
+        )
+
+    results_path = str(tmpdir) + "validation_results.csv"
+    out_df = asyncio.run(
+        kotsu.run.arun(
+            parallel_model_registry,
+            async_validation_registry,
+            results_path=results_path,
+            artefacts_store_dir=str(tmpdir) + "/artefacts/",
+            max_concurrency=4,
+        )
+    )
+
+    assert running["max"] == 4
+    assert list(out_df["score"]) == [10, 11, 12, 20, 21, 22]
+    pd.testing.assert_frame_equal(pd.read_csv(results_path), out_df)
+
+
+def test_arun_offloads_sync_validations(tmpdir):
+    results_path = str(tmpdir) + "validation_results.csv"
+    out_df = asyncio.run(
+        kotsu.run.arun(
+            parallel_model_registry, parallel_validation_registry, results_path=results_path
+        )
+    )
+    assert list(out_df["score"]) == [10, 11, 12, 20, 21, 22]
+
+    out_df = asyncio.run(
+        kotsu.run.arun(
+            parallel_model_registry,
+            parallel_validation_registry,
+            results_path=results_path,
+            force_rerun=["model_1-v1"],
+        )
+    )
+    assert len(out_df) == 6
+
+
+def test_arun_raises_validation_error(tmpdir):
+    def factory_failing_validation():
+        async def failing_validation(model):
+            raise RuntimeError("validation failed")
+
+        return failing_validation
+
+    failing_validation_registry = kotsu.registration.ValidationRegistry()
+    failing_validation_registry.register(
+        id="failing_validation-v1", entry_point=factory_failing_validation
+    )
+
+    with pytest.raises(RuntimeError, match="validation failed"):
+        asyncio.run(
+            kotsu.run.arun(
+                parallel_model_registry,
+                failing_validation_registry,
+                results_path=str(tmpdir) + "validation_results.csv",
+            )
+        )
+
+
+def test_run_in_pool_longest_expected_first(mocker, tmpdir):
+    results_path = str(tmpdir) + "validation_results.csv"
+    pd.DataFrame(
+        [
+            {"validation_id": "validation_1", "model_id": "model_1", "runtime_secs": 10},
+            {"validation_id": "validation_1", "model_id": "model_2", "runtime_secs": 30},
+            {"validation_id": "validation_1", "model_id": "model_3", "runtime_secs": 20},
+        ]
+    ).to_csv(results_path, index=False)
+    patched_pool = mocker.patch("kotsu.run._run_pairs_in_pool", return_value=[])
+
+    kotsu.run.run(
+        FakeRegistry(["model_1", "model_2", "model_3"]),
+        FakeRegistry(["validation_1"]),
+        results_path=results_path,
+        force_rerun="all",
+        n_jobs=2,
+    )
+
+    scheduled_model_ids = [model_spec.id for _, model_spec in patched_pool.call_args[0][0]]
+    assert scheduled_model_ids == ["model_2", "model_3", "model_1"]
+
+
+def test_run_in_pool_packs_resources(mocker, tmpdir):
+    mocker.patch("kotsu.scheduling.available_memory_gb", return_value=None)
+    lock = threading.Lock()
+    running: dict = {"now": set(), "concurrent": {}}
+
+    def factory_tracking_validation():
+        def tracking_validation(model):
+            with lock:
+                running["now"].add(model)
+                running["concurrent"][model] = set(running["now"])
+            time.sleep(0.05)
+            with lock:
+                running["now"].remove(model)
+            return {}
+
+        return tracking_validation
+
+    validation_registry = kotsu.registration.ValidationRegistry()
+    validation_registry.register(id="validation-v1", entry_point=factory_tracking_validation)
+    model_registry = kotsu.registration.ModelRegistry()
+    for model, resources in [
+        ("big_1", {"memory_gb": 30}),
+        ("big_2", {"memory_gb": 30}),
+        ("big_3", {"memory_gb": 30}),
+        ("exclusive", {"exclusive": True}),
+        ("small", {"memory_gb": 1}),
+    ]:
+        model_registry.register(
+            id=f"{model}-v1",
+            entry_point=fake_model_factory,
+            kwargs={"param": model},
+            resources=resources,
+        )
+
+    kotsu.run.run(
+        model_registry,
+        validation_registry,
+        results_path=str(tmpdir) + "validation_results.csv",
+        n_jobs=4,
+        backend="thread",
+        max_memory_gb=64,
+    )
+
+    assert running["concurrent"]["exclusive"] == {"exclusive"}
+    for model, concurrent_models in running["concurrent"].items():
+        assert len({m for m in concurrent_models if m.startswith("big")}) <= 2
+
+
+def fake_slow_validation_factory(sleep_secs):
+    def fake_slow_validation(model):
+        if model == 1:
+            raise RuntimeError("model 1 is broken")
+        time.sleep(sleep_secs)
+        return {"score": model}
+
+    return fake_slow_validation
+
+
+def test_run_isolated_records_failures(tmpdir):
+    validation_registry = kotsu.registration.ValidationRegistry()
+    validation_registry.register(
+        id="fast_validation-v1", entry_point=fake_slow_validation_factory, kwargs={"sleep_secs": 0}
+    )
+    validation_registry.register(
+        id="slow_validation-v1",
+        entry_point=fake_slow_validation_factory,
+        kwargs={"sleep_secs": 10},
+        timeout_secs=0.5,
+    )
+
+    results_path = str(tmpdir) + "validation_results.csv"
+    out_df = kotsu.run.run(
+        parallel_model_registry,
+        validation_registry,
+        results_path=results_path,
+        backend="isolated",
+        timeout_secs=60,
+    )
+
+    assert list(out_df["status"]) == ["ok", "error", "ok", "timeout", "error", "timeout"]
+    assert list(out_df["score"].iloc[[0, 2]]) == [0, 2]
+    assert out_df["error"].iloc[1] == "RuntimeError: model 1 is broken"
+    assert out_df["error"].iloc[3] == "Timed out after 0.5 secs"
+    assert (out_df["runtime_secs"] < 5).all()
+    pd.testing.assert_frame_equal(pd.read_csv(results_path), out_df)
+
+
+@pytest.mark.parametrize(
+    "timeout_secs, validation_timeout_secs, model_timeout_secs, expected",
+    [(None, None, None, None), (10, None, None, 10), (10, 5, None, 5), (10, 5, 1, 1)],
+)
+def test_pair_timeout_secs(timeout_secs, validation_timeout_secs, model_timeout_secs, expected):
+    validation_spec = kotsu.registration.ValidationSpec(
+        "validation-v1", "fake_entry_point", timeout_secs=validation_timeout_secs
+    )
+    model_spec = kotsu.registration.ModelSpec(
+        "model-v1", "fake_entry_point", timeout_secs=model_timeout_secs
+    )
+    assert kotsu.run._pair_timeout_secs(validation_spec, model_spec, timeout_secs) == expected
+
+
+def test_run_recovers_logged_results_after_crash(mocker, tmpdir):
+    patched_run_validation_model = mocker.patch(
+        "kotsu.run._run_validation_model",
+        side_effect=[
+            ({"test_result": "result_1"}, 10),
+            KeyboardInterrupt,
+            ({"test_result": "result_2"}, 20),
+        ],
+    )
+    models = ["model_1", "model_2"]
+    results_path = str(tmpdir) + "/validation_results.csv"
+
+    with pytest.raises(KeyboardInterrupt):
+        kotsu.run.run(FakeRegistry(models), FakeRegistry(["validation_1"]), results_path)
+    assert not os.path.exists(results_path)
+    assert len(kotsu.store.read_log(kotsu.store.log_path(results_path))) == 1
+
+    out_df = kotsu.run.run(FakeRegistry(models), FakeRegistry(["validation_1"]), results_path)
+
+    assert patched_run_validation_model.call_count == 3
+    assert list(out_df["test_result"]) == ["result_1", "result_2"]
+    pd.testing.assert_frame_equal(pd.read_csv(results_path), out_df)
+    assert not os.path.exists(kotsu.store.log_path(results_path))
+
+
+def test_run_parquet_results(tmpdir):
+    results_path = str(tmpdir) + "/validation_results.parquet"
+    out_df = kotsu.run.run(parallel_model_registry, parallel_validation_registry, results_path)
+    assert list(out_df["score"]) == [10, 11, 12, 20, 21, 22]
+    assert os.path.isdir(results_path)
+
+    out_df = kotsu.run.run(
+        parallel_model_registry,
+        parallel_validation_registry,
+        results_store=kotsu.store.ParquetStore(results_path),
+        force_rerun=["model_1-v1"],
+    )
+    assert list(out_df["score"]) == [10, 11, 12, 20, 21, 22]
+    assert not os.path.exists("./validation_results.csv")
+
+
+class SQLiteStoreWithOtherRun(kotsu.store.SQLiteStore):
+    """Simulates another run storing model_2's results after this run has read the store."""
+
+    def contains(self, validation_id, model_id):
+        if model_id == "model_2-v1":
+            kotsu.store.SQLiteStore(self.path).add(
+                {"validation_id": validation_id, "model_id": model_id, "runtime_secs": 0}
+            )
+        return super().contains(validation_id, model_id)
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_run_sqlite_skips_pairs_stored_by_other_run(n_jobs, tmpdir):
+    out_df = kotsu.run.run(
+        parallel_model_registry,
+        parallel_validation_registry,
+        results_store=SQLiteStoreWithOtherRun(str(tmpdir) + "/validation_results.sqlite"),
+        n_jobs=n_jobs,
+        backend="thread",
+    )
+
+    assert list(out_df["model_id"]) == ["model_0-v1", "model_1-v1", "model_2-v1"] * 2
+    assert list(out_df["score"].isna()) == [False, False, True] * 2
+
+
+@pytest.mark.parametrize(
+    "force_rerun, expected_pairs",
+    [
+        (
+            None,
+            [
+                ("validation_1", "model_2"),
+                ("validation_3", "model_1"),
+                ("validation_3", "model_2"),
+            ],
+        ),
+        (
+            ["model_1"],
+            [
+                ("validation_1", "model_1"),
+                ("validation_1", "model_2"),
+                ("validation_3", "model_1"),
+                ("validation_3", "model_2"),
+            ],
+        ),
+        (
+            "all",
+            [
+                ("validation_1", "model_1"),
+                ("validation_1", "model_2"),
+                ("validation_3", "model_1"),
+                ("validation_3", "model_2"),
+            ],
+        ),
+    ],
+)
+def test_plan(force_rerun, expected_pairs, tmpdir):
+    results_path = str(tmpdir) + "/validation_results.csv"
+    pd.DataFrame(
+        [
+            {"validation_id": "validation_1", "model_id": "model_1", "runtime_secs": 10},
+            {"validation_id": "validation_2", "model_id": "model_2", "runtime_secs": 10},
+        ]
+    ).to_csv(results_path, index=False)
+    model_registry = FakeRegistry(["model_1", "model_2", "model_3"])
+    model_registry.entitys[2].deprecated = True
+    validation_registry = FakeRegistry(["validation_1", "validation_2", "validation_3"])
+    validation_registry.entitys[1].deprecated = True
+
+    pending_pairs = kotsu.run.plan(
+        model_registry, validation_registry, results_path, force_rerun=force_rerun
+    )
+
+    assert [
+        (validation_spec.id, model_spec.id) for validation_spec, model_spec in pending_pairs
+    ] == expected_pairs
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_run_iter_yields_results_as_pairs_complete(n_jobs, tmpdir):
+    results_path = str(tmpdir) + "/validation_results.csv"
+    results_iter = kotsu.run.run_iter(
+        parallel_model_registry,
+        parallel_validation_registry,
+        results_path,
+        n_jobs=n_jobs,
+        backend="thread",
+    )
+
+    first_results = next(results_iter)
+    assert {"validation_id", "model_id", "runtime_secs", "score"} <= set(first_results)
+    assert len(kotsu.store.read_log(kotsu.store.log_path(results_path))) >= 1
+    assert not os.path.exists(results_path)
+
+    results_list = [first_results] + list(results_iter)
+    assert sorted(results["score"] for results in results_list) == [10, 11, 12, 20, 21, 22]
+    out_df = pd.read_csv(results_path)
+    assert list(out_df["score"]) == [10, 11, 12, 20, 21, 22]
+    assert not os.path.exists(kotsu.store.log_path(results_path))
+
+
+def test_run_iter_stopped_early_recovers_results(tmpdir):
+    results_path = str(tmpdir) + "/validation_results.csv"
+    results_iter = kotsu.run.run_iter(
+        parallel_model_registry, parallel_validation_registry, results_path
+    )
+    first_results = next(results_iter)
+    results_iter.close()
+
+    pending_pairs = kotsu.run.plan(
+        parallel_model_registry, parallel_validation_registry, results_path
+    )
+    assert len(pending_pairs) == 5
+    assert (first_results["validation_id"], first_results["model_id"]) not in [
+        (validation_spec.id, model_spec.id) for validation_spec, model_spec in pending_pairs
+    ]
+
+    out_df = kotsu.run.run(parallel_model_registry, parallel_validation_registry, results_path)
+    assert list(out_df["score"]) == [10, 11, 12, 20, 21, 22]
+
+
+def fake_dataset_loader(size):
+    return {"X": np.arange(size)}
+
+
+def fake_dataset_validation_factory(data):
+    def fake_dataset_validation(model):
+        return {"total": int(data["X"].sum()) + model, "memory_mapped": type(data["X"]).__name__}
+
+    return fake_dataset_validation
+
+
+dataset_registry = kotsu.registration.DatasetRegistry()
+dataset_registry.register("fake_dataset-v1", entry_point=fake_dataset_loader, kwargs={"size": 4})
+
+dataset_validation_registry = kotsu.registration.ValidationRegistry()
+dataset_validation_registry.register(
+    "dataset_validation-v1",
+    entry_point=fake_dataset_validation_factory,
+    datasets={"data": "fake_dataset-v1"},
+)
+
+
+@pytest.mark.parametrize(
+    "n_jobs, backend, cache, expected_type",
+    [
+        (1, None, False, "ndarray"),
+        (2, "thread", False, "ndarray"),
+        (2, "process", True, "memmap"),
+    ],
+)
+def test_run_passes_datasets(n_jobs, backend, cache, expected_type, mocker, tmpdir):
+    registry = kotsu.registration.DatasetRegistry(
+        cache_dir=str(tmpdir) + "/datasets" if cache else None
+    )
+    registry.entity_specs = dataset_registry.entity_specs
+    patched_loader = mocker.spy(registry, "make")
+
+    out_df = kotsu.run.run(
+        parallel_model_registry,
+        dataset_validation_registry,
+        str(tmpdir) + "/validation_results.csv",
+        n_jobs=n_jobs,
+        backend=backend,
+        dataset_registry=registry,
+    )
+
+    assert list(out_df["total"]) == [6, 7, 8]
+    assert list(out_df["memory_mapped"]) == [expected_type] * 3
+    patched_loader.assert_called_once_with("fake_dataset-v1")
+
+
+def test_run_raises_without_dataset_registry(tmpdir):
+    with pytest.raises(ValueError, match=r"no dataset_registry given"):
+        kotsu.run.run(
+            parallel_model_registry,
+            dataset_validation_registry,
+            str(tmpdir) + "/validation_results.csv",
+        )
@@ -0,0 +1,116 @@
+import math
+
+import pandas as pd
+import pytest
+
+from kotsu import scheduling
+from kotsu.registration import Resources
+
+
+def test_estimate_runtimes():
+    results_df = pd.DataFrame(
+        [
+            {"validation_id": "validation_1", "model_id": "model_1", "runtime_secs": 10},
+            {"validation_id": "validation_1", "model_id": "model_2", "runtime_secs": 30},
+            {"validation_id": "validation_2", "model_id": "model_1", "runtime_secs": 20},
+        ]
+    )
+    estimates = scheduling.estimate_runtimes(
+        [
+            ("validation_1", "model_1"),
+            ("validation_2", "model_2"),
+            ("validation_1", "model_3"),
+            ("validation_3", "model_2"),
+            ("validation_3", "model_3"),
+        ],
+        results_df,
+    )
+    assert estimates == [
+        10,
+        # model_2 mean * validation_2 mean / overall mean
+        30 * 20 / 20,
+        # validation_1 mean
+        20,
+        # model_2 mean
+        30,
+        # median of all
+        20,
+    ]
+
+
+def test_estimate_runtimes_no_prior_results():
+    results_df = pd.DataFrame(columns=["validation_id", "model_id", "runtime_secs"])
+    estimates = scheduling.estimate_runtimes([("validation_1", "model_1")], results_df)
+    assert len(estimates) == 1
+    assert math.isnan(estimates[0])
+
+
+def test_order_longest_first():
+    assert scheduling.order_longest_first(["a", "b", "c", "d"], [1, math.nan, 3, 1]) == [
+        "c",
+        "a",
+        "d",
+        "b",
+    ]
+
+
+@pytest.mark.parametrize(
+    "estimates, n_workers, expected",
+    [
+        ([], 2, 0),
+        ([3, 2, 2, 1], 1, 8),
+        ([3, 2, 2, 1], 2, 4),
+        ([1, 2, 2, 3], 2, 5),
+        ([3, 2, 2, 1], 8, 3),
+        ([3, math.nan], 2, math.nan),
+    ],
+)
+def test_predict_makespan(estimates, n_workers, expected):
+    makespan = scheduling.predict_makespan(estimates, n_workers)
+    if math.isnan(expected):
+        assert math.isnan(makespan)
+    else:
+        assert makespan == expected
+
+
+def test_pair_resources():
+    resources = scheduling.pair_resources(
+        Resources(cpus=2, memory_gb=1), Resources(cpus=4, memory_gb=10, exclusive=True)
+    )
+    assert resources == Resources(cpus=4, memory_gb=11, exclusive=True)
+
+
+def test_resource_pool(mocker):
+    mocker.patch("kotsu.scheduling.available_memory_gb", return_value=None)
+    pool = scheduling.ResourcePool(cpus=4, memory_gb=64)
+
+    # Anything can start when nothing is running, even if too big
+    assert pool.can_start(Resources(cpus=8, memory_gb=128))
+    assert pool.can_start(Resources(exclusive=True))
+
+    pool.start(Resources(cpus=2, memory_gb=30))
+    assert pool.can_start(Resources(cpus=2, memory_gb=30))
+    assert not pool.can_start(Resources(cpus=3, memory_gb=1))
+    assert not pool.can_start(Resources(cpus=1, memory_gb=35))
+    assert not pool.can_start(Resources(exclusive=True))
+
+    pool.start(Resources(cpus=2, memory_gb=30))
+    assert not pool.can_start(Resources(cpus=1, memory_gb=0))
+
+    pool.finish(Resources(cpus=2, memory_gb=30))
+    pool.finish(Resources(cpus=2, memory_gb=30))
+    pool.start(Resources(exclusive=True))
+    assert not pool.can_start(Resources(cpus=1, memory_gb=0))
+
+
+def test_resource_pool_holds_back_under_memory_pressure(mocker):
+    mocker.patch("kotsu.scheduling.total_memory_gb", return_value=100)
+    patched_available_memory = mocker.patch("kotsu.scheduling.available_memory_gb")
+    pool = scheduling.ResourcePool(cpus=4)
+    pool.start(Resources())
+
+    patched_available_memory.return_value = 20
+    assert pool.can_start(Resources(memory_gb=10))
+    assert not pool.can_start(Resources(memory_gb=16))
+    patched_available_memory.return_value = 4
+    assert not pool.can_start(Resources(memory_gb=0))
@@ -1,3 +1,6 @@
+import os
+
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -18,12 +21,144 @@ def test_write(to_front_cols, tmpdir):
             {"id": "v2", "result_b": 20, "result_c": 30},
         ]
     )
-    results_path = str(tmpdir) + "validation_results.csv"
+    results_path = str(tmpdir) + "/validation_results.csv"
     store.write(results, results_path, to_front_cols)
 
     df = pd.read_csv(results_path)
+    assert os.listdir(str(tmpdir)) == ["validation_results.csv"]
     assert len(df) == 2
     assert len(df.columns) == 3
     assert df.loc[0, "id"] == "v1"
     if to_front_cols:
         assert (df.columns[: len(to_front_cols)] == to_front_cols).all()
+
+
+def test_log(tmpdir):
+    path = store.log_path(str(tmpdir) + "/validation_results.csv")
+    assert store.read_log(path) == []
+
+    store.append_to_log({"model_id": "m1", "score": np.float64(0.5), "n": np.int64(3)}, path)
+    store.append_to_log({"model_id": "m2", "score": float("nan")}, path)
+    with open(path, "a") as f:
+        # A line partially written when killed
+        f.write('{"model_id": "m3", "sc')
+
+    results_list = store.read_log(path)
+    assert results_list[0] == {"model_id": "m1", "score": 0.5, "n": 3}
+    assert results_list[1]["model_id"] == "m2"
+    assert np.isnan(results_list[1]["score"])
+    assert len(results_list) == 2
+
+    store.clear_log(path)
+    assert not os.path.exists(path)
+    store.clear_log(path)
+
+
+@pytest.mark.parametrize(
+    "results_path, expected_store",
+    [
+        ("validation_results.csv", store.CSVStore),
+        ("validation_results", store.CSVStore),
+        ("validation_results.parquet", store.ParquetStore),
+        ("validation_results.parquet/", store.ParquetStore),
+        ("validation_results.sqlite", store.SQLiteStore),
+        ("validation_results.db", store.SQLiteStore),
+    ],
+)
+def test_get_store(results_path, expected_store):
+    assert type(store.get_store(results_path)) is expected_store
+
+
+@pytest.mark.parametrize("store_class", [store.CSVStore, store.ParquetStore, store.SQLiteStore])
+def test_store_merge(store_class, tmpdir):
+    results_store = store_class(str(tmpdir) + "/validation_results")
+    assert list(results_store.read().columns) == ["validation_id", "model_id", "runtime_secs"]
+
+    results_store.merge(
+        [
+            {"validation_id": "v2", "model_id": "m1", "runtime_secs": 1.0, "score": 1},
+            {"validation_id": "user/v1", "model_id": "m2", "runtime_secs": 2.0, "score": 2},
+            {"validation_id": "user/v1", "model_id": "m1", "runtime_secs": 3.0, "other": "a"},
+        ]
+    )
+    results_df = store_class(results_store.path).merge(
+        [
+            {"validation_id": "v2", "model_id": "m1", "runtime_secs": 5.0, "score": 5},
+            {"validation_id": "v2", "model_id": "m1", "runtime_secs": 4.0, "score": 4},
+        ]
+    )
+
+    assert list(results_df.columns[:3]) == ["validation_id", "model_id", "runtime_secs"]
+    assert list(results_df["validation_id"]) == ["user/v1", "user/v1", "v2"]
+    assert list(results_df["model_id"]) == ["m1", "m2", "m1"]
+    assert list(results_df["runtime_secs"]) == [3.0, 2.0, 4.0]
+    assert results_df["other"].iloc[0] == "a"
+    assert results_df["score"].iloc[2] == 4
+    pd.testing.assert_frame_equal(
+        store_class(results_store.path).read()[results_df.columns], results_df, check_dtype=False
+    )
+
+
+def test_parquet_store_rewrites_only_affected_partitions(mocker, tmpdir):
+    results_store = store.ParquetStore(str(tmpdir) + "/validation_results.parquet")
+    results_store.merge(
+        [
+            {"validation_id": "v1", "model_id": "m1", "runtime_secs": 1.0},
+            {"validation_id": "v2", "model_id": "m1", "runtime_secs": 2.0},
+        ]
+    )
+    assert sorted(os.listdir(results_store.path)) == ["v1", "v2"]
+
+    spy_to_parquet = mocker.spy(pd.DataFrame, "to_parquet")
+    results_store.merge([{"validation_id": "v2", "model_id": "m2", "runtime_secs": 3.0}])
+    assert spy_to_parquet.call_count == 1
+    assert spy_to_parquet.call_args[0][1].startswith(os.path.join(results_store.path, "v2"))
+
+
+def test_parquet_store_read_columns_and_dtypes(tmpdir):
+    results_store = store.ParquetStore(str(tmpdir) + "/validation_results.parquet")
+    results_store.merge(
+        [{"validation_id": "v1", "model_id": "m1", "runtime_secs": 1.5, "n": 3, "flag": True}]
+    )
+
+    key_df = results_store.read(columns=["validation_id", "model_id"])
+    assert list(key_df.columns) == ["validation_id", "model_id"]
+
+    results_df = results_store.read()
+    assert results_df["n"].dtype == np.int64
+    assert results_df["flag"].dtype == bool
+
+
+@pytest.mark.parametrize("store_class", [store.CSVStore, store.ParquetStore])
+def test_store_add_logs_results(store_class, tmpdir):
+    results_store = store_class(str(tmpdir) + "/validation_results")
+    results_store.add({"validation_id": "v1", "model_id": "m1", "runtime_secs": 1.0})
+    assert store_class(results_store.path).recover() == [
+        {"validation_id": "v1", "model_id": "m1", "runtime_secs": 1.0}
+    ]
+    assert not results_store.contains("v1", "m1")
+
+    results_store.merge(results_store.recover())
+    assert results_store.recover() == []
+    assert len(results_store.read()) == 1
+
+
+def test_sqlite_store_add(tmpdir):
+    results_store = store.SQLiteStore(str(tmpdir) + "/validation_results.sqlite")
+    assert not results_store.contains("v1", "m1")
+
+    results_store.add({"validation_id": "v1", "model_id": "m1", "runtime_secs": 1.0, "s": 0.5})
+    results_store.add({"validation_id": "v1", "model_id": "m1", "runtime_secs": 2.0, "s": 0.7})
+
+    other_results_store = store.SQLiteStore(results_store.path)
+    assert other_results_store.contains("v1", "m1")
+    assert not other_results_store.contains("v1", "m2")
+    assert other_results_store.recover() == []
+    results_df = other_results_store.read()
+    assert results_df.to_dict("records") == [
+        {"validation_id": "v1", "model_id": "m1", "runtime_secs": 2.0, "s": 0.7}
+    ]
+    assert list(other_results_store.read(columns=["validation_id", "s"]).columns) == [
+        "validation_id",
+        "s",
+    ]